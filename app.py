@@ -12,13 +12,41 @@ st.set_page_config(
 
 import pandas as pd
 import xmlrpc.client
-from datetime import datetime
+import http.client
+import urllib.parse
+import itertools
+import gzip
+import random
+import email.utils
+from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
 import time
 import io
 import xlsxwriter
+import openpyxl
 import traceback
+import threading
+import tempfile
+import uuid
+import re
+import bisect
+import heapq
+import sqlite3
+import contextlib
+import array
+import json
+import hashlib
+import csv
+import weakref
+import queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Optional: Parquet uploads
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
 
 # Load environment variables
 load_dotenv()
@@ -34,6 +62,74 @@ ODOO_ADMIN_PASSWORD = os.getenv("ODOO_ADMIN_PASSWORD")
 APP_USERNAME = os.getenv("APP_USERNAME")
 APP_PASSWORD = os.getenv("APP_PASSWORD")
 
+# Max names/IDs per `in` domain when resolving records in bulk
+LOOKUP_CHUNK_SIZE = int(os.getenv("LOOKUP_CHUNK_SIZE", "500"))
+# Default number of quants moved by one stock.quant.relocate wizard
+RELOCATE_CHUNK_SIZE = int(os.getenv("RELOCATE_CHUNK_SIZE", "200"))
+# Uncheck Ignored resolution modes
+UNCHECK_MODE_PER_QC = "Per-QC index"
+UNCHECK_MODE_SEARCH = "Server-side search"
+# Worker threads for Odoo write operations, and how many units may be queued on them
+ODOO_MAX_WORKERS = int(os.getenv("ODOO_MAX_WORKERS", "4"))
+ODOO_MAX_IN_FLIGHT = int(os.getenv("ODOO_MAX_IN_FLIGHT", "8"))
+# Adaptive tuning: Odoo calls slower than this many seconds make batch jobs halve their concurrency and batch sizes
+ODOO_TARGET_LATENCY = float(os.getenv("ODOO_TARGET_LATENCY", "10"))
+# Floors adaptive tuning never goes below: worker threads per job, quants per wizard, quants per search_read page
+ODOO_MIN_WORKERS = int(os.getenv("ODOO_MIN_WORKERS", "1"))
+WIZARD_MIN_QUANTS = int(os.getenv("WIZARD_MIN_QUANTS", "10"))
+QUANT_PAGE_MIN_SIZE = int(os.getenv("QUANT_PAGE_MIN_SIZE", "200"))
+# Keep-alive connections to Odoo shared by all sessions and jobs
+ODOO_MAX_CONNECTIONS = int(os.getenv("ODOO_MAX_CONNECTIONS", "16"))
+# Wire protocol for Odoo calls: "xmlrpc" or "jsonrpc" (cheaper to decode for large reads)
+ODOO_PROTOCOL = os.getenv("ODOO_PROTOCOL", "xmlrpc")
+# Ask for gzip-compressed responses, and gzip request bodies of at least this many bytes (0 = never; the server or its proxy must accept them)
+ODOO_GZIP = os.getenv("ODOO_GZIP", "true").lower() in ("1", "true", "yes")
+ODOO_GZIP_REQUEST_BYTES = int(os.getenv("ODOO_GZIP_REQUEST_BYTES", "0"))
+# Attempts per Odoo call on transient errors, and the exponential backoff base and cap in seconds
+ODOO_RETRY_ATTEMPTS = int(os.getenv("ODOO_RETRY_ATTEMPTS", "5"))
+ODOO_RETRY_BASE_SECONDS = float(os.getenv("ODOO_RETRY_BASE_SECONDS", "0.5"))
+ODOO_RETRY_MAX_SECONDS = float(os.getenv("ODOO_RETRY_MAX_SECONDS", "10"))
+# Retry budget: retries earned per call, and the most that can be saved up
+ODOO_RETRY_BUDGET = float(os.getenv("ODOO_RETRY_BUDGET", "0.2"))
+ODOO_RETRY_RESERVE = int(os.getenv("ODOO_RETRY_RESERVE", "50"))
+# QC lines fetched per search_read page in the QC Export tab
+QC_PAGE_SIZE = int(os.getenv("QC_PAGE_SIZE", "2000"))
+# Quants fetched per search_read page in the Company-Safe Relocation tab
+QUANT_PAGE_SIZE = int(os.getenv("QUANT_PAGE_SIZE", "2000"))
+# Seconds between incremental syncs of the QC name index, and matches listed per search
+QC_INDEX_SYNC_SECONDS = int(os.getenv("QC_INDEX_SYNC_SECONDS", "30"))
+# Incremental syncs keep their write_date mark this many seconds behind Odoo's clock, so late same-second writes are fetched next time
+SYNC_MARK_LAG_SECONDS = int(os.getenv("SYNC_MARK_LAG_SECONDS", "5"))
+QC_SEARCH_LIMIT = int(os.getenv("QC_SEARCH_LIMIT", "200"))
+# Seconds between refreshes of the live preview while a QC downloads
+QC_PREVIEW_SECONDS = float(os.getenv("QC_PREVIEW_SECONDS", "1"))
+# Progress updates are published at most every PROGRESS_MIN_INTERVAL seconds, and only once progress moved PROGRESS_MIN_STEP
+PROGRESS_MIN_INTERVAL = float(os.getenv("PROGRESS_MIN_INTERVAL", "0.1"))
+PROGRESS_MIN_STEP = float(os.getenv("PROGRESS_MIN_STEP", "0.005"))
+# Background jobs run at once, seconds between UI polls, and how long finished jobs are kept
+JOB_MAX_CONCURRENT = int(os.getenv("JOB_MAX_CONCURRENT", "4"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+# Completed-unit journals used to resume interrupted jobs, and how long they are kept
+JOURNAL_DIR = os.getenv("JOURNAL_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "journals")
+JOURNAL_RETENTION_SECONDS = int(os.getenv("JOURNAL_RETENTION_SECONDS", str(7 * 24 * 3600)))
+# Operation log rows kept in memory before older rows spill to disk, and rows per Logs tab page
+LOG_MEMORY_ROWS = int(os.getenv("LOG_MEMORY_ROWS", "10000"))
+LOG_PAGE_SIZE = int(os.getenv("LOG_PAGE_SIZE", "1000"))
+# Upload summaries kept in the shared cache, and rows per batch when streaming an upload
+UPLOAD_CACHE_ENTRIES = int(os.getenv("UPLOAD_CACHE_ENTRIES", "16"))
+UPLOAD_BATCH_ROWS = int(os.getenv("UPLOAD_BATCH_ROWS", "50000"))
+# Rows read for the upload preview; the jobs count the whole file as they stream it
+UPLOAD_PREVIEW_ROWS = int(os.getenv("UPLOAD_PREVIEW_ROWS", "1000"))
+# Batches buffered between pipeline stages (read → resolve → relocate)
+PIPELINE_DEPTH = int(os.getenv("PIPELINE_DEPTH", "2"))
+# Accepted upload formats
+UPLOAD_TYPES = ['xlsx', 'xls', 'csv'] + (['parquet'] if pq else [])
+# Scratch directory for generated export files
+EXPORT_DIR = os.getenv("EXPORT_DIR") or os.path.join(tempfile.gettempdir(), "odoo_portal_exports")
+# SQLite file caching QC lines across sessions and restarts
+QC_CACHE_PATH = os.getenv("QC_CACHE_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "qc_lines.sqlite3")
+
 # ============================
 # INITIALIZE SESSION STATE
 # ============================
@@ -43,21 +139,25 @@ def init_session_state():
         'logged_in': False,
         'current_tab': "QC Export",
         'odoo_conn': None,
+        'download_cache': {},
         # Relocation
-        'relocation_processing': False,
+        'relocation_job_id': None,
         'relocation_results': None,
-        'relocation_logs': [],
+        'relocation_logs': None,
         # QC
         'qc_selected': None,
         'qc_data': None,
+        'qc_run_id': None,
         # Company Safe
-        'company_relocation_processing': False,
+        'company_relocation_job_id': None,
         'company_relocation_results': None,
-        'company_relocation_logs': [],
+        'company_relocation_logs': None,
         # Uncheck
-        'uncheck_processing': False,
+        'uncheck_job_id': None,
         'uncheck_results': None,
-        'uncheck_logs': []
+        'uncheck_logs': None,
+        # Failed jobs, by kind: {'error', 'run_id'} of the last one
+        'job_failures': {}
     }
     
     for key, value in defaults.items():
@@ -218,43 +318,1484 @@ def inject_custom_css():
     """, unsafe_allow_html=True)
 
 # ============================
-# BACKEND FUNCTIONS
+# ODOO RPC CLIENT
 # ============================
+RPC_PROTOCOLS = ('xmlrpc', 'jsonrpc')
+
+class RpcConnection:
+    """One keep-alive HTTP connection to Odoo, speaking XML-RPC or JSON-RPC.
+    
+    Both protocols share the execute(service, method, *args) call surface
+    and raise xmlrpc.client.Fault for server errors. With `accept_gzip` the
+    server may compress responses; request bodies of at least
+    `gzip_request_bytes` are compressed too. `stats` holds the payload
+    sizes (before and after compression) and decode time of the last call;
+    `server_date` its HTTP Date header, i.e. the server's clock.
+    """
+    
+    def __init__(self, url, protocol, accept_gzip=True, gzip_request_bytes=0):
+        if protocol not in RPC_PROTOCOLS:
+            raise ValueError(f"Unknown Odoo protocol: {protocol}")
+        parts = urllib.parse.urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.netloc)
+        self.base_path = parts.path.rstrip('/')
+        self.protocol = protocol
+        self.accept_gzip = accept_gzip
+        self.gzip_request_bytes = gzip_request_bytes
+        self.stats = None
+        self.server_date = None
+        self._request_ids = itertools.count(1)
+    
+    def _encode(self, service, method, args):
+        if self.protocol == 'jsonrpc':
+            body = json.dumps({
+                "jsonrpc": "2.0", "method": "call", "id": next(self._request_ids),
+                "params": {"service": service, "method": method, "args": args},
+            })
+            return "/jsonrpc", "application/json", body.encode()
+        body = xmlrpc.client.dumps(tuple(args), method, encoding="utf-8")
+        return f"/xmlrpc/2/{service}", "text/xml", body.encode()
+    
+    def _decode(self, data):
+        if self.protocol == 'jsonrpc':
+            response = json.loads(data)
+            error = response.get('error')
+            if error:
+                message = (error.get('data') or {}).get('message') or error.get('message')
+                raise xmlrpc.client.Fault(error.get('code', 0), message)
+            return response['result']
+        return xmlrpc.client.loads(data)[0][0]
+    
+    def _post(self, path, content_type, body):
+        """POST `body`; returns the decompressed response and the bytes sent and received on the wire"""
+        headers = {"Content-Type": content_type}
+        if self.accept_gzip:
+            headers["Accept-Encoding"] = "gzip"
+        if self.gzip_request_bytes and len(body) >= self.gzip_request_bytes:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        
+        for attempt in (0, 1):
+            try:
+                self.connection.request("POST", self.base_path + path, body, headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+                # The server closed the idle keep-alive connection; reconnect once, like xmlrpc.client does
+                self.connection.close()
+                if attempt:
+                    raise
+            except Exception:
+                self.connection.close()
+                raise
+        self.server_date = response.getheader("Date")
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(self.base_path + path, response.status, response.reason, dict(response.getheaders()))
+        received = len(data)
+        if (response.getheader("Content-Encoding") or "").lower() == "gzip":
+            data = gzip.decompress(data)
+        return data, len(body), received
+    
+    def execute(self, service, method, *args):
+        path, content_type, body = self._encode(service, method, list(args))
+        data, sent, received = self._post(path, content_type, body)
+        start = time.perf_counter()
+        result = self._decode(data)
+        self.stats = {
+            'request_bytes': len(body),
+            'request_wire_bytes': sent,
+            'response_bytes': len(data),
+            'response_wire_bytes': received,
+            'decode_seconds': time.perf_counter() - start,
+        }
+        return result
+
+# Methods that only read, so they can be retried freely
+READ_METHODS = frozenset({'read', 'search', 'search_read', 'search_count', 'name_search', 'read_group', 'fields_get'})
+
+def is_transient_error(error):
+    """Whether an Odoo call failed for a passing reason (network, overload, lock conflict) rather than a business error"""
+    if isinstance(error, xmlrpc.client.Fault):
+        # PostgreSQL serialization failures surface as faults when Odoo gives up retrying them
+        message = str(error.faultString)
+        return "could not serialize access" in message or "concurrent update" in message
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        return error.errcode in (429, 502, 503, 504)
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+class RetryPolicy:
+    """Exponential backoff with jitter, limited by a retry budget.
+    
+    Every call earns `budget` retry tokens (saving up at most `reserve`)
+    and every retry spends one, so retries stay a small share of the
+    traffic: during an outage calls fail fast instead of piling up retries.
+    """
+    
+    def __init__(self, attempts, base_delay, max_delay, budget, reserve):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.reserve = reserve
+        self.tokens = float(reserve)
+        self.lock = threading.Lock()
+    
+    def earn(self):
+        with self.lock:
+            self.tokens = min(self.reserve, self.tokens + self.budget)
+    
+    def allow(self, attempt):
+        """Whether failed attempt number `attempt` may be retried; spends a token if so"""
+        if attempt >= self.attempts:
+            return False
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+    
+    def delay(self, attempt):
+        """Seconds to wait before retrying after failed attempt number `attempt`"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        # Jitter spreads out workers that failed together
+        return delay / 2 + random.uniform(0, delay / 2)
+
+class OdooClient:
+    """Odoo RPC client backed by a pool of keep-alive connections.
+    
+    A connection is not thread-safe, so every call borrows one for its own
+    use and hands it back afterwards. At most `max_connections` are ever
+    opened; callers beyond that wait for one to be returned. One client can
+    be shared by every session, job and worker thread. `protocol` picks
+    XML-RPC or JSON-RPC; results are the same either way. `traffic` adds up
+    the bytes of every call, before and after compression; thread_counts()
+    gives each thread its own share of the calls and transient errors.
+    """
+    
+    def __init__(self, url, db, password, max_connections, protocol='xmlrpc',
+                 accept_gzip=True, gzip_request_bytes=0, retry=None):
+        self.url = url
+        self.db = db
+        self.password = password
+        self.max_connections = max_connections
+        self.protocol = protocol
+        self.accept_gzip = accept_gzip
+        self.gzip_request_bytes = gzip_request_bytes
+        self.retry = retry
+        self.uid = None
+        self.traffic = dict.fromkeys(
+            ('calls', 'retries', 'request_bytes', 'request_wire_bytes', 'response_bytes', 'response_wire_bytes'), 0
+        )
+        self._idle = []
+        self._opened = 0
+        self._available = threading.Condition()
+        self._traffic_lock = threading.Lock()
+        self._thread = threading.local()
+    
+    def thread_counts(self):
+        """(call attempts, transient errors) made so far on the current thread, retried or not"""
+        return getattr(self._thread, 'calls', 0), getattr(self._thread, 'errors', 0)
+    
+    def server_time(self):
+        """Odoo's clock (naive UTC, like write_date) when the current thread's last call was answered, or None"""
+        try:
+            return email.utils.parsedate_to_datetime(self._thread.server_date).astimezone(timezone.utc).replace(tzinfo=None)
+        except (AttributeError, TypeError, ValueError):
+            return None
+    
+    def connect(self):
+        """A new connection with this client's protocol and compression settings"""
+        return RpcConnection(self.url, self.protocol, self.accept_gzip, self.gzip_request_bytes)
+    
+    def authenticate(self, login):
+        """Log in once; later calls reuse the user ID"""
+        if not self.uid:
+            self.uid = self.connect().execute("common", "authenticate", self.db, login, self.password, {})
+        return self.uid
+    
+    def _acquire(self):
+        with self._available:
+            while not self._idle and self._opened >= self.max_connections:
+                self._available.wait()
+            if self._idle:
+                # Most recently used first, so warm connections are reused
+                return self._idle.pop()
+            self._opened += 1
+        return self.connect()
+    
+    def _release(self, connection):
+        with self._available:
+            self._idle.append(connection)
+            self._available.notify()
+    
+    def call(self, model, method, args, kw=None, applied=None):
+        """execute_kw() as the authenticated user, on a pooled connection.
+        
+        Transient failures are retried with backoff: reads always, writes
+        only when `applied` is given. It runs before each retry and returns
+        a truthy result if the failed attempt took effect after all; that
+        result is then returned instead of writing twice.
+        """
+        retryable = method in READ_METHODS or applied is not None
+        for attempt in itertools.count(1):
+            self._thread.calls = getattr(self._thread, 'calls', 0) + 1
+            try:
+                return self._execute(model, method, args, kw)
+            except Exception as e:
+                if is_transient_error(e):
+                    self._thread.errors = getattr(self._thread, 'errors', 0) + 1
+                if not (self.retry and retryable and is_transient_error(e) and self.retry.allow(attempt)):
+                    raise
+            with self._traffic_lock:
+                self.traffic['retries'] += 1
+            time.sleep(self.retry.delay(attempt))
+            if applied is not None:
+                result = applied()
+                if result:
+                    return result
+    
+    def _execute(self, model, method, args, kw):
+        if self.retry:
+            self.retry.earn()
+        connection = self._acquire()
+        try:
+            result = connection.execute("object", "execute_kw", self.db, self.uid, self.password, model, method, args, kw or {})
+            self._thread.server_date = connection.server_date
+            with self._traffic_lock:
+                self.traffic['calls'] += 1
+                for key in ('request_bytes', 'request_wire_bytes', 'response_bytes', 'response_wire_bytes'):
+                    self.traffic[key] += connection.stats[key]
+            return result
+        finally:
+            self._release(connection)
+
+def benchmark_protocols(odoo, model, method, args, kw=None, repeat=3):
+    """Run one call over each protocol on fresh connections; returns a comparison table.
+    
+    Payload sizes and the best round trip of `repeat` runs, with the time
+    spent decoding the response.
+    """
+    rows = []
+    for protocol in RPC_PROTOCOLS:
+        connection = RpcConnection(odoo.url, protocol, odoo.accept_gzip, odoo.gzip_request_bytes)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            connection.execute("object", "execute_kw", odoo.db, odoo.uid, odoo.password, model, method, args, kw or {})
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best[0]:
+                best = (elapsed, connection.stats)
+        elapsed, stats = best
+        rows.append({
+            'Protocol': protocol,
+            'Request (KB)': round(stats['request_bytes'] / 1024, 1),
+            'Response (KB)': round(stats['response_bytes'] / 1024, 1),
+            'On the Wire (KB)': round(stats['response_wire_bytes'] / 1024, 1),
+            'Round Trip (ms)': round(elapsed * 1000, 1),
+            'Decode (ms)': round(stats['decode_seconds'] * 1000, 1),
+        })
+        connection.connection.close()
+    return pd.DataFrame(rows)
+
 @st.cache_resource(show_spinner=False)
+def odoo_client():
+    retry = RetryPolicy(ODOO_RETRY_ATTEMPTS, ODOO_RETRY_BASE_SECONDS, ODOO_RETRY_MAX_SECONDS,
+                        ODOO_RETRY_BUDGET, ODOO_RETRY_RESERVE)
+    return OdooClient(ODOO_URL, ODOO_DB, ODOO_ADMIN_PASSWORD, ODOO_MAX_CONNECTIONS, ODOO_PROTOCOL,
+                      ODOO_GZIP, ODOO_GZIP_REQUEST_BYTES, retry)
+
 def get_odoo_connection():
-    """Establish Odoo connection and cache it"""
+    """Authenticate the shared Odoo client; returns it, or None if login fails"""
     try:
-        common = xmlrpc.client.ServerProxy(f"{ODOO_URL}/xmlrpc/2/common")
-        uid = common.authenticate(ODOO_DB, ODOO_ADMIN_USER, ODOO_ADMIN_PASSWORD, {})
-        if not uid:
-            return None
-        models = xmlrpc.client.ServerProxy(f"{ODOO_URL}/xmlrpc/2/object")
-        return {"common": common, "uid": uid, "models": models}
+        odoo = odoo_client()
+        return odoo if odoo.authenticate(ODOO_ADMIN_USER) else None
     except Exception as e:
         st.error(f"Connection error: {str(e)}")
         return None
 
-@st.cache_data(ttl=600, show_spinner=False)
-def fetch_qc_list(_models, uid, password):
-    """Fetch QC list from Odoo"""
-    try:
-        qc_ids = _models.execute_kw(
-            ODOO_DB, uid, password,
-            "stock.quantity.check", "search",
-            [[]],
-            {"order": "create_date desc", "limit": 400}
+# ============================
+# BACKEND FUNCTIONS
+# ============================
+def sync_mark(latest, server_now):
+    """write_date mark for the next `write_date > mark` delta sync.
+    
+    The latest write_date seen, but at most SYNC_MARK_LAG_SECONDS before
+    Odoo's clock when the sync started (`server_now`; the local clock if
+    unknown). Records written in the same second as the mark are then
+    fetched again, while records written long ago in one bulk transaction,
+    which all share one write_date, are not.
+    """
+    if not latest:
+        return None
+    now = server_now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return min(latest, (now - timedelta(seconds=SYNC_MARK_LAG_SECONDS)).strftime("%Y-%m-%d %H:%M:%S"))
+
+class QCNameIndex:
+    """In-memory index of every QC name, kept current with write_date deltas.
+    
+    The first sync loads all QCs; later syncs only pull records written since
+    the previous one. Lookups never touch Odoo: prefix matches come from a
+    sorted list via bisect, substring matches from an n-gram posting index,
+    both ranked newest first.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.invalidate()
+    
+    def invalidate(self):
+        """Forget everything so the next sync reloads all QCs"""
+        with self.lock:
+            self.names_by_id = {}
+            self.high_water = None
+            self.last_sync = 0.0
+            self._rebuild()
+    
+    def __len__(self):
+        return len(self.snapshot[0])
+    
+    def sync(self, odoo, max_age=None):
+        """Pull QCs created or changed since the last sync, at most every `max_age` seconds"""
+        max_age = QC_INDEX_SYNC_SECONDS if max_age is None else max_age
+        with self.lock:
+            if time.time() - self.last_sync < max_age:
+                return
+            
+            domain = [("write_date", ">", self.high_water)] if self.high_water else []
+            # The mark only moves once every page is in, so a failed sync is simply redone
+            last_id, changed, high_water, started = 0, False, self.high_water, None
+            while True:
+                page = odoo.call(
+                    "stock.quantity.check", "search_read",
+                    [domain + [("id", ">", last_id)]],
+                    {"fields": ["name", "write_date"], "order": "id", "limit": QC_PAGE_SIZE}
+                )
+                started = started or odoo.server_time()
+                for record in page:
+                    changed |= self.names_by_id.get(record["id"]) != record["name"]
+                    self.names_by_id[record["id"]] = record["name"]
+                    high_water = max(high_water or "", record["write_date"] or "")
+                if len(page) < QC_PAGE_SIZE:
+                    break
+                last_id = page[-1]["id"]
+            
+            if changed:
+                self._rebuild()
+            self.high_water = sync_mark(high_water, started)
+            self.last_sync = time.time()
+    
+    def _rebuild(self):
+        # Newest first, matching the old create_date desc listing
+        newest_first = [name for _, name in sorted(self.names_by_id.items(), reverse=True)]
+        lowered = [name.lower() for name in newest_first]
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+        sorted_lower = [lowered[position] for position in order]
+        
+        # 1-, 2- and 3-gram -> positions in newest_first (so newest first), so
+        # substring search only verifies candidates, whatever the query length
+        postings = {}
+        for position, name in enumerate(lowered):
+            grams = {name[i:i + size] for size in (1, 2, 3) for i in range(len(name) - size + 1)}
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        grams = {gram: array.array('I', positions) for gram, positions in postings.items()}
+        
+        # Swapped in one assignment so concurrent searches see a consistent view
+        self.snapshot = (newest_first, lowered, sorted_lower, array.array('I', order), grams)
+    
+    def search(self, query, limit=200):
+        """Return up to `limit` names, newest first: prefix matches, then other substring matches"""
+        newest_first, lowered, sorted_lower, order, grams = self.snapshot
+        query = query.strip().lower()
+        if not query:
+            return newest_first[:limit]
+        
+        # Prefix matches are a contiguous range of the sorted names
+        lo = bisect.bisect_left(sorted_lower, query)
+        hi = bisect.bisect_left(sorted_lower, query + "\U0010ffff", lo)
+        if (hi - lo) ** 2 > limit * len(lowered):
+            # Most names match: walking newest first finds `limit` of them sooner than ranking the range
+            prefix = []
+            for position, name in enumerate(lowered):
+                if len(prefix) >= limit:
+                    break
+                if name.startswith(query):
+                    prefix.append(position)
+        else:
+            prefix = heapq.nsmallest(limit, order[lo:hi])
+        matches = dict.fromkeys(newest_first[position] for position in prefix)
+        
+        postings = [grams.get(query[i:i + 3], ()) for i in range(max(len(query) - 2, 1))]
+        for position in min(postings, key=len):
+            if len(matches) >= limit:
+                break
+            name = lowered[position]
+            if query in name and not name.startswith(query):
+                matches.setdefault(newest_first[position], None)
+        return list(matches)
+
+@st.cache_resource(show_spinner=False)
+def qc_name_index():
+    """QC name index shared by all sessions"""
+    return QCNameIndex()
+
+def chunked(items, size):
+    """Yield successive slices of at most `size` items.
+    
+    `size` may be a callable, read before each slice, so an adaptive batch
+    size applies to the slices not yet taken.
+    """
+    start = 0
+    while start < len(items):
+        step = size() if callable(size) else size
+        yield items[start:start + step]
+        start += step
+
+def plan_relocation(odoo, lot_names, chunk_size=LOOKUP_CHUNK_SIZE):
+    """Resolve unique lot names to quant IDs with chunked search_read calls"""
+    lot_ids_by_name = {}
+    for chunk in chunked(lot_names, chunk_size):
+        lots = odoo.call(
+            'stock.lot', 'search_read',
+            [[['name', 'in', chunk]]],
+            {'fields': ['id', 'name']}
+        )
+        for lot in lots:
+            # Keep the first match per name, like search()[0] did
+            lot_ids_by_name.setdefault(lot['name'], lot['id'])
+    
+    quant_ids_by_lot = {}
+    for chunk in chunked(list(lot_ids_by_name.values()), chunk_size):
+        quants = odoo.call(
+            'stock.quant', 'search_read',
+            [[['lot_id', 'in', chunk]]],
+            {'fields': ['id', 'lot_id']}
         )
-        if qc_ids:
-            qc_records = _models.execute_kw(
-                ODOO_DB, uid, password,
-                "stock.quantity.check", "read",
-                [qc_ids],
-                {"fields": ["name"]}
+        for quant in quants:
+            quant_ids_by_lot.setdefault(quant['lot_id'][0], []).append(quant['id'])
+    
+    plan = {'moves': [], 'missing_lots': [], 'missing_quants': []}
+    for lot_name in lot_names:
+        lot_id = lot_ids_by_name.get(lot_name)
+        if lot_id is None:
+            plan['missing_lots'].append(lot_name)
+        elif lot_id not in quant_ids_by_lot:
+            plan['missing_quants'].append(lot_name)
+        else:
+            plan['moves'].append((lot_name, quant_ids_by_lot[lot_id]))
+    return plan
+
+def fetch_source_quants(odoo, lot_names, source_location_ids, on_chunk=None,
+                        chunk_size=LOOKUP_CHUNK_SIZE, page_size=None, controller=None):
+    """Fetch the quants of `lot_names` in the source locations.
+    
+    Lots are split into chunks fetched concurrently, each paged until
+    exhausted. `on_chunk(done, total)` reports progress on the calling
+    thread. With a `controller`, it sets the page size and the number of
+    chunks in flight. Returns (quants de-duplicated by id, lot names with
+    no quant).
+    """
+    page_size = page_size or QUANT_PAGE_SIZE
+    
+    def fetch_chunk(chunk):
+        quants, last_id = [], 0
+        while True:
+            limit = controller.batch_size if controller else page_size
+            page = odoo.call(
+                "stock.quant", "search_read",
+                [[
+                    ['lot_id.name', 'in', chunk],
+                    ['location_id', 'in', source_location_ids],
+                    ['id', '>', last_id]
+                ]],
+                {
+                    'fields': ['id', 'lot_id', 'location_id', 'quantity', 'reserved_quantity', 'company_id'],
+                    'order': 'id',
+                    'limit': limit
+                }
             )
-            return [qc["name"] for qc in qc_records]
-        return []
-    except Exception:
-        return []
+            quants.extend(page)
+            if len(page) < limit:
+                return quants
+            last_id = page[-1]['id']
+    
+    chunks = list(chunked(lot_names, chunk_size))
+    done = [0]
+    
+    def on_result(*_):
+        done[0] += 1
+        if on_chunk:
+            on_chunk(done[0], len(chunks))
+    
+    quants_by_id = {}
+    for quants, error in run_parallel(chunks, fetch_chunk, on_result=on_result, controller=controller):
+        if error:
+            raise error
+        for quant in quants:
+            quants_by_id.setdefault(quant['id'], quant)
+    
+    found = {q['lot_id'][1] for q in quants_by_id.values() if q['lot_id']}
+    missing = [lot for lot in lot_names if lot not in found]
+    return [quants_by_id[qid] for qid in sorted(quants_by_id)], missing
+
+def relocate_quants(odoo, quant_ids, dest_location_id, message):
+    """Create a stock.quant.relocate wizard for the quants and execute it.
+    
+    Both calls are retried on transient errors without moving anything twice.
+    """
+    ctx = {'action_ref': 'stock.action_view_inventory_tree'}
+    
+    def relocated():
+        # Relocating moves stock, not quant records: the source quants are emptied
+        # (and later removed) and the destination gets quants of its own. The move
+        # is one transaction, so it went through if none of them still holds stock.
+        return not odoo.call(
+            'stock.quant', 'search_count',
+            [[('id', 'in', quant_ids), ('location_id', '!=', dest_location_id), ('quantity', '>', 0)]]
+        )
+    
+    wizard_id = odoo.call(
+        'stock.quant.relocate', 'create',
+        [{
+            'quant_ids': [(6, 0, quant_ids)],
+            'dest_location_id': dest_location_id,
+            'message': message,
+        }],
+        {'context': ctx},
+        # A stray wizard from a failed attempt is harmless, so create is simply retried
+        applied=lambda: False
+    )
+    odoo.call(
+        'stock.quant.relocate', 'action_relocate_quants',
+        [[wizard_id]],
+        {'context': ctx},
+        applied=relocated
+    )
+
+def group_moves(moves, quants_per_chunk):
+    """Pack (lot_name, quant_ids) moves into chunks of up to `quants_per_chunk` quants.
+    
+    Like chunked(), `quants_per_chunk` may be a callable read as each chunk
+    fills up.
+    """
+    chunk, size = [], 0
+    for move in moves:
+        limit = quants_per_chunk() if callable(quants_per_chunk) else quants_per_chunk
+        if chunk and size + len(move[1]) > limit:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(move)
+        size += len(move[1])
+    if chunk:
+        yield chunk
+
+def execute_with_bisection(units, action):
+    """Run `action` on all units, halving the batch on failure to isolate bad units.
+    
+    Returns (unit, error) pairs in input order; error is None on success.
+    Each call is its own Odoo transaction, so a failed call applies nothing.
+    """
+    try:
+        action(units)
+        return [(unit, None) for unit in units]
+    except Exception as e:
+        if len(units) == 1:
+            return [(units[0], str(e))]
+        middle = len(units) // 2
+        return (execute_with_bisection(units[:middle], action) +
+                execute_with_bisection(units[middle:], action))
+
+# ============================
+# PARALLEL EXECUTION
+# ============================
+def run_parallel(units, work, on_result=None, max_workers=None, max_in_flight=None, controller=None):
+    """Run `work(unit)` for every unit on a bounded thread pool.
+    
+    Workers call Odoo through the shared client and must not touch Streamlit.
+    At most `max_in_flight` units are submitted at once. `on_result(index, unit,
+    result, error)` runs on the calling thread as units finish, so it can update
+    progress and logs. Returns (result, error) pairs in input order.
+    
+    With a `controller`, the units in flight follow its concurrency and each
+    unit's latency, Odoo calls and transient errors (including retried ones)
+    are reported back to it. `units` is consumed lazily, so units built from
+    the controller's batch size pick up its latest value.
+    """
+    if controller:
+        max_workers = controller.max_concurrency
+    else:
+        max_workers = max_workers or ODOO_MAX_WORKERS
+        max_in_flight = max(max_in_flight or ODOO_MAX_IN_FLIGHT, max_workers)
+    results = []
+    pending = {}
+    queued = iter(enumerate(units))
+    
+    def limit():
+        return controller.concurrency if controller else max_in_flight
+    
+    def measured(unit):
+        # Counted on the worker thread, so other units' calls are not mixed in
+        calls, errors = controller.thread_counts()
+        result = work(unit)
+        calls_after, errors_after = controller.thread_counts()
+        return result, calls_after - calls, errors_after - errors
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        def submit_next():
+            for index, unit in queued:
+                results.append(None)
+                future = pool.submit(measured if controller else work, unit)
+                pending[future] = (index, unit, time.monotonic())
+                return True
+            return False
+        
+        while len(pending) < limit() and submit_next():
+            pass
+        
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index, unit, started = pending.pop(future)
+                error = future.exception()
+                result = None if error else future.result()
+                if controller:
+                    result, calls, errors = result or (None, 0, 0)
+                    controller.observe(started, error, calls, errors)
+                results[index] = (result, error)
+                if on_result:
+                    on_result(index, unit, result, error)
+            while len(pending) < limit() and submit_next():
+                pass
+    
+    return results
+
+class AimdController:
+    """Sizes batches and concurrency from observed Odoo latency, AIMD-style.
+    
+    A unit slower than `target_latency`, or one whose Odoo calls hit a
+    transient error (even if a retry then succeeded), halves the
+    concurrency and batch size, at most once per round trip:
+    units started before the last decrease are not counted again. Every
+    `concurrency` healthy units in a row add one worker and one floor's
+    worth of batch size. Both start at their ceiling and stay within
+    their (floor, ceiling) ranges; without `batch_size` only the
+    concurrency is tuned. Calls and errors are counted on `odoo`.
+    """
+    
+    def __init__(self, label, odoo, concurrency, batch_size=None, target_latency=None):
+        self.label = label
+        self.odoo = odoo
+        self.min_concurrency, self.max_concurrency = concurrency
+        self.min_concurrency = max(1, min(self.min_concurrency, self.max_concurrency))
+        self.concurrency = self.max_concurrency
+        if batch_size:
+            self.min_batch, self.max_batch = batch_size
+            self.min_batch = max(1, min(self.min_batch, self.max_batch))
+        self.batch_size = self.max_batch if batch_size else None
+        self.target_latency = target_latency or ODOO_TARGET_LATENCY
+        self.calls = 0
+        self.errors = 0
+        self.decreases = 0
+        self.latency = None
+        self.healthy = 0
+        self.decreased_at = float('-inf')
+    
+    def thread_counts(self):
+        return self.odoo.thread_counts()
+    
+    def observe(self, started, error=None, calls=0, errors=0):
+        """Record a unit started at `started` (time.monotonic()) that just finished.
+        
+        `calls` and `errors` are its Odoo call attempts and transient errors;
+        a unit that raised a transient error counts as at least one of each.
+        """
+        finished = time.monotonic()
+        seconds = finished - started
+        if error is not None and is_transient_error(error):
+            calls, errors = max(calls, 1), max(errors, 1)
+        self.calls += calls
+        self.errors += errors
+        # Moving average, for display only
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        
+        if errors or seconds > self.target_latency:
+            self.healthy = 0
+            if started >= self.decreased_at:
+                self.decreased_at = finished
+                self.decreases += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                if self.batch_size:
+                    self.batch_size = max(self.min_batch, self.batch_size // 2)
+        elif error is None:
+            self.healthy += 1
+            if self.healthy >= self.concurrency:
+                self.healthy = 0
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                if self.batch_size:
+                    self.batch_size = min(self.max_batch, self.batch_size + self.min_batch)
+    
+    def describe(self):
+        text = f"{self.label}: {self.concurrency} in flight"
+        if self.batch_size:
+            text += f" · {self.batch_size:,} per call"
+        if self.latency is not None:
+            text += f" · {self.latency:.1f}s per unit · {self.decreases} slow-downs"
+        if self.calls:
+            text += f" · {self.errors / self.calls:.1%} transient errors over {self.calls:,} calls"
+        return text
+
+class PipelineStage:
+    """Counters of one pipeline stage, shown while a job runs to spot the bottleneck"""
+    
+    def __init__(self, label):
+        self.label = label
+        self.batches = 0
+        self.rows = 0
+        self.busy = 0.0
+        self.started = time.monotonic()
+        self.buffer = None
+    
+    def record(self, rows, seconds):
+        self.batches += 1
+        self.rows += rows
+        self.busy += seconds
+    
+    @contextlib.contextmanager
+    def work(self, rows):
+        """Count the enclosed block as this stage working on `rows` rows"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(rows, time.monotonic() - start)
+    
+    def timed(self, batches):
+        """Iterate `batches`, counting the time spent producing each one as work"""
+        batches = iter(batches)
+        while True:
+            start = time.monotonic()
+            try:
+                batch = next(batches)
+            except StopIteration:
+                return
+            self.record(len(batch), time.monotonic() - start)
+            yield batch
+    
+    def describe(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.rows / self.busy if self.busy else 0
+        text = (f"{self.label}: {self.batches} batches · {self.rows:,} rows · "
+                f"{rate:,.0f} rows/s · {self.busy / elapsed:.0%} busy")
+        if self.buffer is not None:
+            text += f" · {self.buffer.qsize()}/{self.buffer.maxsize} queued"
+        return text
+
+def prefetch(items, depth=2, stage=None):
+    """Iterate `items` on a background thread, keeping up to `depth` of them ready.
+    
+    Lets a job work on one batch while the next is being read; chaining
+    prefetch() calls builds a pipeline with one thread per stage. The
+    thread stops as soon as the consumer stops iterating. With `stage`,
+    the stage's queue depth can be watched.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    if stage is not None:
+        stage.buffer = buffer
+    
+    def put(entry):
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce():
+        try:
+            for item in items:
+                if not put(('item', item)):
+                    return
+            put(('done', None))
+        except Exception as e:
+            put(('error', e))
+        finally:
+            # Stops upstream prefetch() threads too
+            close = getattr(items, 'close', None)
+            if close is not None:
+                close()
+    
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == 'done':
+                return
+            if kind == 'error':
+                raise value
+            yield value
+    finally:
+        stop.set()
+
+# ============================
+# FILE INGESTION
+# ============================
+def normalize_cell(value):
+    """Cell value as a stripped string, or None when empty"""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:
+            return None
+        if value.is_integer():
+            value = int(value)
+    value = str(value).strip()
+    return value or None
+
+def upload_format(upload):
+    """'xlsx', 'xls', 'csv' or 'parquet', from the file name and then the content"""
+    extension = os.path.splitext(upload['name'])[1].lower().lstrip('.')
+    if extension in ('xlsx', 'xls', 'csv', 'parquet'):
+        return extension
+    if upload['data'].startswith(b"PK"):
+        return 'xlsx'
+    if upload['data'].startswith(b"PAR1"):
+        return 'parquet'
+    return 'csv'
+
+def iter_upload_batches(upload, columns, batch_size=None):
+    """Yield DataFrames of up to `batch_size` rows holding only `columns` of an upload.
+    
+    CSV, Parquet and .xlsx files are streamed, so memory follows the batch
+    size rather than the file size. Values are normalized with
+    normalize_cell(). Requested columns missing from the file are left out,
+    and at least one (possibly empty) batch is always yielded.
+    """
+    batch_size = batch_size or UPLOAD_BATCH_ROWS
+    file_format = upload_format(upload)
+    source = io.BytesIO(upload['data'])
+    
+    def frame(data):
+        return pd.DataFrame({column: [normalize_cell(value) for value in values] for column, values in data.items()}, dtype=object)
+    
+    if file_format == 'csv':
+        reader = pd.read_csv(source, usecols=lambda column: column in columns, dtype=str,
+                             keep_default_na=False, chunksize=batch_size)
+        for chunk in reader:
+            yield frame({column: chunk[column] for column in columns if column in chunk.columns})
+    
+    elif file_format == 'parquet':
+        if pq is None:
+            raise ValueError("Parquet uploads need the pyarrow package")
+        parquet_file = pq.ParquetFile(source)
+        present = [column for column in columns if column in parquet_file.schema_arrow.names]
+        yielded = False
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=present):
+            yielded = True
+            yield frame({column: record_batch.column(column).to_pylist() for column in present})
+        if not yielded:
+            yield frame({column: [] for column in present})
+    
+    elif file_format == 'xls':
+        # Legacy .xls (at most 65k rows) cannot be streamed
+        df = pd.read_excel(source, usecols=lambda column: column in columns, dtype=object)
+        present = [column for column in columns if column in df.columns]
+        for start in range(0, max(len(df), 1), batch_size):
+            yield frame({column: df[column].iloc[start:start + batch_size].tolist() for column in present})
+    
+    else:
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = list(next(rows, ()))
+            wanted = [(column, header.index(column)) for column in columns if column in header]
+            data = {column: [] for column, _ in wanted}
+            yielded = False
+            empty_rows = 0
+            for row in rows:
+                values = [row[position] if position < len(row) else None for _, position in wanted]
+                
+                # Styled but empty rows at the bottom of a sheet are not data
+                if all(normalize_cell(value) is None for value in values):
+                    empty_rows += 1
+                    continue
+                for _ in range(empty_rows):
+                    for column in data:
+                        data[column].append(None)
+                empty_rows = 0
+                for (column, _), value in zip(wanted, values):
+                    data[column].append(value)
+                
+                if wanted and len(data[wanted[0][0]]) >= batch_size:
+                    yield frame(data)
+                    yielded = True
+                    data = {column: [] for column, _ in wanted}
+            if not yielded or (wanted and data[wanted[0][0]]):
+                yield frame(data)
+        finally:
+            workbook.close()
+
+def estimate_upload_rows(upload):
+    """Data rows of an upload without parsing it: exact for Parquet, approximate
+    for CSV (line count) and .xlsx (sheet dimension), 0 when unknown"""
+    file_format = upload_format(upload)
+    data = upload['data']
+    if file_format == 'parquet':
+        return pq.ParquetFile(io.BytesIO(data)).metadata.num_rows if pq else 0
+    if file_format == 'csv':
+        lines = data.count(b'\n') + (1 if data and not data.endswith(b'\n') else 0)
+        return max(lines - 1, 0)
+    if file_format == 'xlsx':
+        workbook = openpyxl.load_workbook(io.BytesIO(data), read_only=True)
+        try:
+            return max((workbook.worksheets[0].max_row or 1) - 1, 0)
+        finally:
+            workbook.close()
+    return 0
+
+@st.cache_data(max_entries=UPLOAD_CACHE_ENTRIES, show_spinner=False)
+def summarize_upload(digest, name, columns, _file_data):
+    """Columns found and first rows of an upload, read from its first UPLOAD_PREVIEW_ROWS rows only.
+    
+    Row and unique counts are exact when the preview covers the whole file;
+    otherwise rows are estimated and unique values are left to the job.
+    """
+    upload = {'name': name, 'data': _file_data}
+    batches = iter_upload_batches(upload, columns, UPLOAD_PREVIEW_ROWS)
+    try:
+        preview = next(batches)
+        exact = next(batches, None) is None
+    finally:
+        batches.close()
+    return {
+        'columns': list(preview.columns),
+        'rows': len(preview) if exact else estimate_upload_rows(upload),
+        'exact': exact,
+        'unique': {column: preview[column].dropna().nunique() for column in preview.columns},
+        'head': preview.head(10),
+    }
+
+def read_upload(uploaded_file, columns):
+    """Describe an uploaded file for preview and processing; returns (upload, summary).
+    
+    The summary is cached by content hash, so reruns never re-read the file.
+    Jobs stream the rows themselves with iter_upload_batches(upload, ...);
+    upload['rows'] is the summary's row count, possibly an estimate (0 if
+    unknown), for progress totals only.
+    """
+    file_data = uploaded_file.getvalue()
+    digest = hashlib.sha256(file_data).hexdigest()
+    summary = summarize_upload(digest, uploaded_file.name, tuple(columns), file_data)
+    upload = {'name': uploaded_file.name, 'data': file_data, 'digest': digest, 'rows': summary['rows']}
+    return upload, summary
+
+def show_upload_stats(summary, rows_label, unique_label, unique_column):
+    """Row and unique-value metrics of an upload preview, side by side"""
+    col_stats1, col_stats2 = st.columns(2)
+    with col_stats1:
+        if summary['exact']:
+            st.metric(rows_label, f"{summary['rows']:,}")
+        else:
+            st.metric(rows_label, f"≈ {summary['rows']:,}" if summary['rows'] else "—",
+                      help="Estimated from the file; the exact count is reported when the job finishes")
+    with col_stats2:
+        if summary['exact']:
+            st.metric(unique_label, f"{summary['unique'][unique_column]:,}")
+        else:
+            st.metric(unique_label, "—", help="Counted while the job runs")
+
+def batch_label(label, number, upload):
+    """Progress label, numbered when the upload is read in several batches"""
+    count = -(-upload['rows'] // UPLOAD_BATCH_ROWS)
+    if count > 1:
+        # The count comes from an estimate, so it may run out before the batches do
+        return f"{label} · batch {number}/{count}" if number <= count else f"{label} · batch {number}"
+    return label
+
+# ============================
+# OPERATION LOGS
+# ============================
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class LogStore:
+    """Append-only operation log with a fixed schema, stored as columns.
+    
+    Categorical columns (status, action) hold small integer codes and other
+    repeated strings are interned. Past `memory_rows` rows, the in-memory rows
+    are spilled to a JSONL scratch file with per-row byte offsets, so page()
+    seeks straight to any row and export_csv() streams without building a
+    DataFrame of everything. The scratch file goes away with the store.
+    """
+    
+    def __init__(self, columns, categorical=(), memory_rows=None):
+        self.columns = list(columns)
+        self.memory_rows = memory_rows or LOG_MEMORY_ROWS
+        self.categories = {column: {} for column in categorical}
+        self._reset_memory()
+        self.spill_path = None
+        self.offsets = array.array('Q')
+        self.spill_end = 0
+    
+    def _reset_memory(self):
+        self.data = [array.array('H') if column in self.categories else [] for column in self.columns]
+        self.values = {}
+    
+    def __len__(self):
+        return len(self.offsets) + len(self.data[0])
+    
+    def append(self, *row):
+        """Add a row, values in column order"""
+        for column, values, value in zip(self.columns, self.data, row):
+            if column in self.categories:
+                codes = self.categories[column]
+                values.append(codes.setdefault(value, len(codes)))
+            else:
+                values.append(self.values.setdefault(value, value) if isinstance(value, str) else value)
+        if len(self.data[0]) >= self.memory_rows:
+            self._spill()
+    
+    def _memory_rows(self, start=0, stop=None):
+        labels = {column: list(codes) for column, codes in self.categories.items()}
+        columns = [
+            [labels[column][code] for code in values[start:stop]] if column in labels else values[start:stop]
+            for column, values in zip(self.columns, self.data)
+        ]
+        return zip(*columns)
+    
+    def _spill(self):
+        if self.spill_path is None:
+            fd, self.spill_path = export_file(".log.jsonl")
+            os.close(fd)
+            weakref.finalize(self, _remove_file, self.spill_path)
+        with open(self.spill_path, 'ab') as f:
+            for row in self._memory_rows():
+                line = (json.dumps(row, default=str) + "\n").encode('utf-8')
+                self.offsets.append(self.spill_end)
+                self.spill_end += len(line)
+                f.write(line)
+        self._reset_memory()
+    
+    def iter_rows(self, start=0, stop=None):
+        """Yield rows [start, stop) as tuples, oldest first"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        spilled = len(self.offsets)
+        if start < min(stop, spilled):
+            with open(self.spill_path, 'rb') as f:
+                f.seek(self.offsets[start])
+                for _ in range(min(stop, spilled) - start):
+                    yield tuple(json.loads(f.readline()))
+        if stop > spilled:
+            yield from self._memory_rows(max(start - spilled, 0), stop - spilled)
+    
+    def page(self, start, size):
+        return pd.DataFrame(list(self.iter_rows(start, start + size)), columns=self.columns)
+    
+    def export_csv(self):
+        """Write the whole log to a CSV scratch file and return its path"""
+        fd, path = export_file(".csv")
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.columns)
+            writer.writerows(self.iter_rows())
+        return path
+
+def show_logs(logs, run_id, key, height=400):
+    """Logs tab: one page of the log and a download of all of it"""
+    if not logs:
+        st.info("No logs available.")
+        return
+    
+    pages = -(-len(logs) // LOG_PAGE_SIZE)
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages}, {len(logs)} entries)", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+    st.dataframe(logs.page((page - 1) * LOG_PAGE_SIZE, LOG_PAGE_SIZE), use_container_width=True, height=height)
+    
+    lazy_download_button(
+        run_id, "logs_csv", logs.export_csv,
+        label="📥 Download Logs",
+        file_name=f"{key}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv",
+        use_container_width=True,
+        key=f"download_{key}"
+    )
+
+# ============================
+# PROGRESS REPORTING
+# ============================
+class ProgressReporter:
+    """Coalesce per-item progress into a few published snapshots with throughput and ETA.
+    
+    Hot loops can call update() or advance() for every item; `publish(snapshot)`
+    only runs when a phase starts or completes, or when `min_interval` seconds
+    passed and the fraction moved by `min_step` (time alone when the total is
+    unknown).
+    """
+    
+    def __init__(self, publish, min_interval=None, min_step=None):
+        self.publish = publish
+        self.min_interval = PROGRESS_MIN_INTERVAL if min_interval is None else min_interval
+        self.min_step = PROGRESS_MIN_STEP if min_step is None else min_step
+        self.label, self.unit = '', 'items'
+        self.done, self.total = 0, 0
+        self.started = self.published_at = time.monotonic()
+        self.published_fraction = 0.0
+    
+    def phase(self, label, total=0, unit='items'):
+        """Start a new phase; throughput and ETA are measured per phase"""
+        self.label, self.unit = label, unit
+        self.done, self.total = 0, total
+        self.started = time.monotonic()
+        self._publish(self.started)
+    
+    def update(self, done, total=None):
+        self.done = done
+        if total is not None:
+            self.total = total
+        fraction = self.fraction
+        if fraction >= 1.0 and self.published_fraction < 1.0:
+            self._publish(time.monotonic())
+            return
+        now = time.monotonic()
+        if now - self.published_at < self.min_interval:
+            return
+        if self.total and fraction - self.published_fraction < self.min_step:
+            return
+        self._publish(now)
+    
+    def advance(self, count=1):
+        self.update(self.done + count)
+    
+    @property
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
+    
+    def _publish(self, now):
+        self.published_at, self.published_fraction = now, self.fraction
+        elapsed = now - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        self.publish({
+            'label': self.label,
+            'unit': self.unit,
+            'done': self.done,
+            'total': self.total,
+            'fraction': self.fraction,
+            'rate': rate,
+            'eta': remaining / rate if rate and remaining > 0 else None,
+        })
+
+def format_duration(seconds):
+    """Short human duration such as 45s, 3m 05s or 1h 02m"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+def format_bytes(count):
+    """Short human size such as 812 B, 4.2 KB or 1.3 MB"""
+    if count < 1024:
+        return f"{count} B"
+    for unit in ("KB", "MB", "GB"):
+        count /= 1024
+        if count < 1024 or unit == "GB":
+            return f"{count:.1f} {unit}"
+
+def progress_text(snapshot):
+    """One-line description of a progress snapshot"""
+    parts = [snapshot['label']]
+    if snapshot['total']:
+        parts.append(f"{snapshot['done']:,}/{snapshot['total']:,} {snapshot['unit']}")
+    elif snapshot['done']:
+        parts.append(f"{snapshot['done']:,} {snapshot['unit']}")
+    if snapshot['rate']:
+        parts.append(f"{snapshot['rate']:,.1f} {snapshot['unit']}/s")
+    if snapshot['eta'] is not None:
+        parts.append(f"ETA {format_duration(snapshot['eta'])}")
+    return " · ".join(parts)
+
+def progress_bar_reporter(container=None):
+    """ProgressReporter drawing into a Streamlit progress bar; returns (reporter, bar)"""
+    bar = (container or st).progress(0.0)
+    reporter = ProgressReporter(lambda snapshot: bar.progress(snapshot['fraction'], text=progress_text(snapshot)))
+    return reporter, bar
+
+# ============================
+# BACKGROUND JOBS
+# ============================
+class Job:
+    """A long operation running in the background, with progress, logs and a result"""
+    
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'Queued'
+        self.snapshot = None
+        self.progress = ProgressReporter(self._store_snapshot)
+        self.logs = None
+        self.stages = []
+        self.controllers = []
+        self.result = None
+        self.error = None
+        self.created = datetime.now()
+        self.finished_at = None
+    
+    @property
+    def finished(self):
+        return self.status in ('Done', 'Failed')
+    
+    def _store_snapshot(self, snapshot):
+        # Swapping in a whole dict lets pollers on other threads read it without a lock
+        self.snapshot = snapshot
+
+class JobManager:
+    """Runs jobs on a thread pool and keeps their state outside any session.
+    
+    A job survives reruns, closed tabs and dropped websockets; sessions only
+    hold job IDs and poll the state. Finished jobs are kept for
+    JOB_RETENTION_SECONDS so their results can still be collected.
+    """
+    
+    def __init__(self, max_jobs):
+        self.pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+        self.lock = threading.Lock()
+        self.jobs = {}
+    
+    def submit(self, kind, run, *args):
+        """Queue `run(job, *args)`; its return value becomes the job result"""
+        job = Job(kind)
+        with self.lock:
+            self._prune()
+            self.jobs[job.id] = job
+        self.pool.submit(self._run, job, run, args)
+        return job
+    
+    def _run(self, job, run, args):
+        job.status = 'Running'
+        try:
+            job.result = run(job, *args)
+            job.status = 'Done'
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = 'Failed'
+        finally:
+            job.finished_at = time.time()
+    
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self.jobs[job_id]
+    
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def recent(self):
+        """All retained jobs, newest first"""
+        with self.lock:
+            return sorted(self.jobs.values(), key=lambda job: job.created, reverse=True)
+
+class RunJournal:
+    """Append-only JSONL journal of the units a job has completed.
+    
+    There is one journal per job kind, file content and outcome-affecting
+    settings, so a rerun of the same file finds the journal of the run it
+    resumes. Each unit is written as soon as its Odoo write succeeds.
+    """
+    
+    def __init__(self, kind, file_digest, *params):
+        digest = hashlib.sha256(json.dumps([kind, file_digest, *params]).encode())
+        self.path = os.path.join(JOURNAL_DIR, f"{digest.hexdigest()[:32]}.jsonl")
+    
+    def count(self):
+        """Number of recorded units, without parsing them"""
+        try:
+            with open(self.path, 'rb') as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+    
+    def completed(self):
+        """Recorded units; a line torn by a crash mid-write is ignored"""
+        units = set()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        unit = json.loads(line)['unit']
+                    except (ValueError, KeyError):
+                        continue
+                    units.add(tuple(unit) if isinstance(unit, list) else unit)
+        except FileNotFoundError:
+            pass
+        return units
+    
+    def record(self, units):
+        """Append completed units; closing the file hands them to the OS right away"""
+        if not units:
+            return
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps({'unit': unit, 'at': datetime.now().isoformat(timespec='seconds')}) + "\n" for unit in units)
+    
+    def start(self, resume):
+        """Units to skip when resuming; a fresh run drops the old journal first"""
+        if resume:
+            return self.completed()
+        self.discard()
+        
+        # Sweep journals of runs nobody resumed
+        cutoff = time.time() - JOURNAL_RETENTION_SECONDS
+        for name in os.listdir(JOURNAL_DIR) if os.path.isdir(JOURNAL_DIR) else []:
+            stale_path = os.path.join(JOURNAL_DIR, name)
+            try:
+                if os.path.getmtime(stale_path) < cutoff:
+                    os.remove(stale_path)
+            except OSError:
+                pass
+        return set()
+    
+    def discard(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+@st.cache_resource
+def job_manager():
+    """Job manager shared by all sessions"""
+    return JobManager(JOB_MAX_CONCURRENT)
+
+# Job kind -> (tab, session key of the job ID, results key, logs key)
+JOB_KINDS = {
+    "Bulk Relocation": ("Bulk Relocation", 'relocation_job_id', 'relocation_results', 'relocation_logs'),
+    "Company-Safe Relocation": ("Company-Safe Relocation", 'company_relocation_job_id', 'company_relocation_results', 'company_relocation_logs'),
+    "Uncheck Ignored": ("Uncheck Ignored", 'uncheck_job_id', 'uncheck_results', 'uncheck_logs'),
+}
+
+def start_job(kind, run, *args):
+    """Submit a job for this session's tab, replacing any previous result"""
+    _, job_key, results_key, logs_key = JOB_KINDS[kind]
+    st.session_state[logs_key] = None
+    clear_results(results_key)
+    failure = st.session_state.job_failures.pop(kind, None)
+    if failure:
+        evict_downloads(failure['run_id'])
+    st.session_state[job_key] = job_manager().submit(kind, run, *args).id
+
+def show_job_status(kind):
+    """Show the tab's job progress; once it ends, move its result and logs into the session"""
+    _, job_key, results_key, logs_key = JOB_KINDS[kind]
+    job = job_manager().get(st.session_state[job_key])
+    if job is None:
+        st.session_state[job_key] = None
+        st.warning("⚠️ This job is no longer available.")
+        return
+    if not job.finished:
+        poll_job(job.id)
+        return
+    
+    st.session_state[job_key] = None
+    st.session_state[logs_key] = job.logs
+    if job.error:
+        st.session_state.job_failures[kind] = {'error': job.error, 'run_id': job.id}
+    else:
+        st.session_state[results_key] = job.result
+
+def show_job_failure(kind):
+    """Show why the tab's last job failed, with the logs of what it did before"""
+    _, job_key, results_key, logs_key = JOB_KINDS[kind]
+    failure = st.session_state.job_failures.get(kind)
+    if failure is None or st.session_state[job_key] is not None or st.session_state[logs_key] is None:
+        return
+    st.error(f"❌ Error during processing: {failure['error']}")
+    with st.expander("📋 Processing Logs", expanded=True):
+        show_logs(st.session_state[logs_key], failure['run_id'], f"{logs_key}_failed", height=300)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_job(job_id):
+    """Refresh a running job's progress without rerunning the page"""
+    job = job_manager().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+    st.warning(f"⏳ {job.status}... The job runs in the background; you can leave this page and reopen it from the sidebar.")
+    if job.snapshot:
+        st.progress(job.snapshot['fraction'], text=progress_text(job.snapshot))
+    for stage in job.stages + job.controllers:
+        st.caption(stage.describe())
+
+# ============================
+# DOWNLOAD ARTIFACTS
+# ============================
+def lazy_download_button(run_id, artifact, build, **kwargs):
+    """Download button whose payload is built only when the user clicks it.
+    
+    `build()` returns bytes or the path of a generated file. The result is
+    memoized per result set (`run_id`) in st.session_state.download_cache
+    until evict_downloads() drops it, so reruns never re-serialize.
+    """
+    entry = st.session_state.download_cache.setdefault(run_id, {'lock': threading.Lock(), 'payloads': {}})
+    
+    # Streamlit runs this on its own thread, so it only touches the captured entry
+    def payload():
+        with entry['lock']:
+            if artifact not in entry['payloads']:
+                entry['payloads'][artifact] = build()
+            data = entry['payloads'][artifact]
+        if isinstance(data, str):
+            with open(data, 'rb') as f:
+                return f.read()
+        return data
+    
+    st.download_button(data=payload, **kwargs)
+
+def evict_downloads(run_id):
+    """Drop the memoized downloads of a result set and delete generated files"""
+    entry = st.session_state.download_cache.pop(run_id, None)
+    if entry:
+        with entry['lock']:
+            for data in entry['payloads'].values():
+                if isinstance(data, str) and os.path.exists(data):
+                    os.remove(data)
+
+def clear_results(results_key):
+    """Clear a tab's results together with their memoized downloads"""
+    results = st.session_state.get(results_key)
+    if results:
+        evict_downloads(results['run_id'])
+    st.session_state[results_key] = None
+
+def export_file(suffix):
+    """Create an empty scratch file in EXPORT_DIR; returns (fd, path)"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    
+    # Sweep files left behind by sessions that expired without evicting them
+    cutoff = time.time() - 24 * 3600
+    for name in os.listdir(EXPORT_DIR):
+        stale_path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(stale_path) < cutoff:
+                os.remove(stale_path)
+        except OSError:
+            pass
+    
+    return tempfile.mkstemp(suffix=suffix, dir=EXPORT_DIR)
+
+def clear_qc_data():
+    """Clear the fetched QC data together with its memoized downloads"""
+    evict_downloads(st.session_state.qc_run_id)
+    st.session_state.qc_data = None
+    st.session_state.qc_selected = None
+    st.session_state.qc_run_id = None
 
 # ============================
 # LOGIC & UI FOR TABS
@@ -263,7 +1804,7 @@ def fetch_qc_list(_models, uid, password):
 # ------------------------------------
 # TAB 1: COMPANY-SAFE BULK RELOCATION
 # ------------------------------------
-def show_company_safe_relocation_tab(models, uid):
+def show_company_safe_relocation_tab(odoo):
     """Display Company-Safe Bulk Relocation functionality"""
     st.markdown("## 🏢 Company-Safe Bulk Relocation")
     st.markdown("Relocate lots with strict company matching validation.")
@@ -273,7 +1814,7 @@ def show_company_safe_relocation_tab(models, uid):
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
     st.markdown("### ⚙️ Configuration Settings")
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         source_locations = st.text_input(
             "Source Location IDs",
@@ -290,6 +1831,14 @@ def show_company_safe_relocation_tab(models, uid):
             key="company_dest_location"
         )
     with col3:
+        quants_per_wizard = st.number_input(
+            "Quants per Wizard",
+            min_value=1,
+            value=RELOCATE_CHUNK_SIZE,
+            help="Most quants moved by each relocation wizard; wizards shrink while Odoo responds slowly. Failed wizards are split to isolate the failing quants.",
+            key="company_relocation_chunk_size"
+        )
+    with col4:
         st.markdown("<br>", unsafe_allow_html=True)
         st.info(f"📍 Moving to Location ID: **{dest_location_id}**")
     
@@ -297,40 +1846,36 @@ def show_company_safe_relocation_tab(models, uid):
     
     # File Upload Section
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    st.markdown("### 📤 Upload Excel File")
+    st.markdown("### 📤 Upload Lot File")
     
     uploaded_file = st.file_uploader(
-        "Choose an Excel file with 'Lot' column",
-        type=['xlsx', 'xls'],
-        help="Excel file must contain a column named 'Lot'",
+        "Choose an Excel, CSV or Parquet file with 'Lot' column",
+        type=UPLOAD_TYPES,
+        help="File must contain a column named 'Lot'",
         key="company_relocation_uploader"
     )
     
     if uploaded_file is not None:
         try:
-            # Read and validate the Excel file
-            df = pd.read_excel(uploaded_file)
+            # Summarize and validate the file; the job streams the rows itself
+            upload, summary = read_upload(uploaded_file, ["Lot"])
             
-            if 'Lot' not in df.columns:
-                st.error("❌ Excel file must contain a column named 'Lot'")
+            if 'Lot' not in summary['columns']:
+                st.error("❌ File must contain a column named 'Lot'")
                 st.markdown('</div>', unsafe_allow_html=True)
                 return
             
             # Display preview
             st.markdown("### 📋 Data Preview")
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(summary['head'].head(), use_container_width=True)
             
             # Statistics
             st.markdown("### 📊 Statistics")
-            col_stats1, col_stats2 = st.columns(2)
-            with col_stats1:
-                st.metric("Total Lots", len(df))
-            with col_stats2:
-                st.metric("Unique Lots", df['Lot'].nunique())
+            show_upload_stats(summary, "Total Lots", "Unique Lots", "Lot")
             
             # Sample lots
             st.markdown("### 🎯 Sample Lots")
-            st.code("\n".join(df['Lot'].dropna().head(10).astype(str).tolist()))
+            st.code("\n".join(summary['head']['Lot'].dropna().tolist()))
             
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
@@ -349,144 +1894,145 @@ def show_company_safe_relocation_tab(models, uid):
             if st.button("▶️ Start Company-Safe Relocation", 
                         type="primary",
                         use_container_width=True,
+                        disabled=st.session_state.company_relocation_job_id is not None,
                         key="start_company_relocation"):
-                # Initialize processing state
-                st.session_state.company_relocation_processing = True
-                st.session_state.company_relocation_logs = []
-                st.session_state.company_relocation_results = None
-                
-                # Store uploaded file and config in session state
-                st.session_state.company_relocation_file = uploaded_file
-                st.session_state.company_source_locations_str = source_locations
-                st.session_state.company_dest_location_id = dest_location_id
-                
-                # Trigger rerun to start processing
+                # Run in the background; the session only keeps the job ID
+                start_job(
+                    "Company-Safe Relocation", process_company_safe_relocation,
+                    odoo, upload, source_locations, dest_location_id, quants_per_wizard
+                )
                 st.rerun()
         
         with col2:
             if st.button("🔄 Reset", 
                         use_container_width=True,
                         key="reset_company_relocation"):
-                # Clear relocation state
-                st.session_state.company_relocation_processing = False
-                st.session_state.company_relocation_results = None
-                st.session_state.company_relocation_logs = []
-                if 'company_relocation_file' in st.session_state:
-                    del st.session_state.company_relocation_file
+                # Detach from the job (it keeps running, see the sidebar) and clear relocation state
+                st.session_state.company_relocation_job_id = None
+                clear_results('company_relocation_results')
+                st.session_state.company_relocation_logs = None
                 st.rerun()
         
-        # Show processing status
-        if st.session_state.company_relocation_processing:
-            st.warning("⏳ Processing in progress... Please wait.")
-            
-            # Process the file if we're in processing state
-            if 'company_relocation_file' in st.session_state:
-                process_company_safe_relocation(models, uid)
-        
         st.markdown('</div>', unsafe_allow_html=True)
     
+    # Follow the running job, if any
+    if st.session_state.company_relocation_job_id is not None:
+        show_job_status("Company-Safe Relocation")
+    show_job_failure("Company-Safe Relocation")
+    
     # Display results if available
     if (st.session_state.company_relocation_results is not None and 
-        not st.session_state.company_relocation_processing):
+        st.session_state.company_relocation_job_id is None):
         display_company_relocation_results()
 
-def process_company_safe_relocation(models, uid):
-    """Process company-safe relocation (FULL LOGIC)"""
+def process_company_safe_relocation(job, odoo, upload, source_locations_str, dest_location_id, quants_per_wizard):
+    """Relocate lots with company matching validation (background job).
+    
+    The file is streamed in batches; each batch's quants are fetched,
+    filtered and relocated while the next batch is read.
+    """
+    DEST_LOCATION_ID = dest_location_id
+    QUANTS_PER_WIZARD = quants_per_wizard
+    job.logs = LogStore(['timestamp', 'action', 'details'], categorical=['action'])
+    
+    # Parse source locations
     try:
-        # Get configuration from session state
-        uploaded_file = st.session_state.company_relocation_file
-        source_locations_str = st.session_state.company_source_locations_str
-        DEST_LOCATION_ID = st.session_state.company_dest_location_id
-        
-        # Parse source locations
-        try:
-            SOURCE_LOCATION_IDS = [int(loc.strip()) for loc in source_locations_str.split(",") if loc.strip()]
-        except:
-            st.error("❌ Invalid source location IDs format")
-            st.session_state.company_relocation_processing = False
-            return
-        
-        # Read Excel file
-        df = pd.read_excel(uploaded_file)
-        LOT_COLUMN = "Lot"
-        lots = list(set(df[LOT_COLUMN].dropna().astype(str).tolist()))
-        
-        # Get destination company
+        SOURCE_LOCATION_IDS = [int(loc.strip()) for loc in source_locations_str.split(",") if loc.strip()]
+    except:
+        raise ValueError("Invalid source location IDs format")
+    
+    # Get destination company
+    try:
+        dest_location = odoo.call(
+            "stock.location", "read",
+            [DEST_LOCATION_ID],
+            {'fields': ['company_id']}
+        )
+    except Exception as e:
+        raise ValueError(f"Error fetching destination company: {str(e)}")
+    
+    if not dest_location:
+        raise ValueError("Destination location not found")
+    
+    DEST_COMPANY_ID = dest_location[0]['company_id'][0] if dest_location[0]['company_id'] else None
+    if not DEST_COMPANY_ID:
+        raise ValueError("Destination location has no company assigned")
+    
+    # Create initial log entry
+    job.logs.append(datetime.now().strftime("%H:%M:%S"), 'Started Processing', f'Processing {upload["name"]} from locations {SOURCE_LOCATION_IDS} to {DEST_LOCATION_ID}')
+    
+    def relocate_batch(batch):
+        def relocate(units):
+            relocate_quants(odoo, [qid for _, qid in units], DEST_LOCATION_ID,
+                            "Bulk Company-Safe Relocation via Streamlit Portal")
+        return execute_with_bisection(batch, relocate)
+    
+    def batch_outcomes(batch, outcomes, error):
+        if error is not None:
+            return [(unit, str(error)) for unit in batch]
+        return outcomes
+    
+    # Page and wizard sizes adapt to Odoo's response times, across file batches
+    fetch_control = AimdController("🎛️ Fetch", odoo, (ODOO_MIN_WORKERS, ODOO_MAX_WORKERS), (QUANT_PAGE_MIN_SIZE, QUANT_PAGE_SIZE))
+    relocate_control = AimdController("🎛️ Relocate", odoo, (ODOO_MIN_WORKERS, ODOO_MAX_WORKERS), (WIZARD_MIN_QUANTS, QUANTS_PER_WIZARD))
+    job.controllers = [fetch_control, relocate_control]
+    quant_errors = {}
+    
+    def on_result(index, batch, outcomes, error):
+        for (_, qid), quant_error in batch_outcomes(batch, outcomes, error):
+            quant_errors[qid] = quant_error
+        job.progress.advance(len(batch))
+    
+    success = []
+    skipped = []
+    missing_lots = []
+    seen = set()
+    read_error = None
+    
+    # A read error ends the run early; earlier batches already moved, so they are still reported
+    def read_batches():
+        nonlocal read_error
         try:
-            dest_location = models.execute_kw(
-                ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                "stock.location", "read",
-                [DEST_LOCATION_ID],
-                {'fields': ['company_id']}
-            )
-            
-            if not dest_location:
-                st.error("❌ Destination location not found")
-                st.session_state.company_relocation_processing = False
-                return
-                
-            DEST_COMPANY_ID = dest_location[0]['company_id'][0] if dest_location[0]['company_id'] else None
-            if not DEST_COMPANY_ID:
-                st.error("❌ Destination location has no company assigned")
-                st.session_state.company_relocation_processing = False
-                return
-                
+            yield from iter_upload_batches(upload, ["Lot"])
         except Exception as e:
-            st.error(f"❌ Error fetching destination company: {str(e)}")
-            st.session_state.company_relocation_processing = False
-            return
-        
-        # Initialize counters and logs
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Create initial log entry
-        log_entry = {
-            'timestamp': datetime.now().strftime("%H:%M:%S"),
-            'action': 'Started Processing',
-            'details': f'Processing {len(lots)} lots from locations {SOURCE_LOCATION_IDS} to {DEST_LOCATION_ID}'
-        }
-        st.session_state.company_relocation_logs.append(log_entry)
-        
-        # Fetch all quants for all lots
+            read_error = str(e)
+    
+    for number, lot_batch in enumerate(prefetch(read_batches()), 1):
+        # Unique lots of this batch not seen in an earlier one
+        lots = [lot for lot in dict.fromkeys(lot_batch.get("Lot", [])) if lot is not None and lot not in seen]
+        seen.update(lots)
+        if not lots:
+            continue
+        
+        # Fetch the batch's quants
         try:
-            status_text.text("🔍 Fetching quants from Odoo...")
+            job.progress.phase(batch_label("🔍 Fetching quants from Odoo", number, upload), unit="lot chunks")
             
-            quant_records = models.execute_kw(
-                ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                "stock.quant", "search_read",
-                [[
-                    ['lot_id.name', 'in', lots],
-                    ['location_id', 'in', SOURCE_LOCATION_IDS]
-                ]],
-                {
-                    'fields': ['id', 'lot_id', 'location_id', 'quantity', 'reserved_quantity', 'company_id'],
-                    'limit': 20000
-                }
+            quant_records, batch_missing = fetch_source_quants(
+                odoo, lots, SOURCE_LOCATION_IDS,
+                on_chunk=job.progress.update, controller=fetch_control
             )
             
-            log_entry = {
-                'timestamp': datetime.now().strftime("%H:%M:%S"),
-                'action': 'Quants Fetched',
-                'details': f'Found {len(quant_records)} quants'
-            }
-            st.session_state.company_relocation_logs.append(log_entry)
+            job.logs.append(datetime.now().strftime("%H:%M:%S"), 'Quants Fetched', batch_label(f'Found {len(quant_records)} quants', number, upload))
+            
+            if batch_missing:
+                job.logs.append(datetime.now().strftime("%H:%M:%S"), 'Missing Lots', batch_label(f'{len(batch_missing)} lots have no quant in the source locations', number, upload))
             
         except Exception as e:
-            st.error(f"❌ Error fetching quants: {str(e)}")
-            st.session_state.company_relocation_processing = False
-            return
+            # Skip this batch's lots and carry on with the next batch
+            job.logs.append(datetime.now().strftime("%H:%M:%S"), 'Fetch Failed', batch_label(f'Skipped {len(lots)} lots: {str(e)}', number, upload))
+            skipped.extend((lot_name, f"Quant fetch failed: {str(e)}") for lot_name in lots)
+            continue
+        
+        missing_lots.extend(batch_missing)
+        skipped.extend((lot_name, "No quant found in source locations") for lot_name in batch_missing)
         
         # Filter quants
         valid_quants = []
-        skipped = []
-        
-        status_text.text("🔍 Filtering valid quants...")
-        
-        for i, q in enumerate(quant_records):
+        job.progress.phase(batch_label("🔍 Filtering valid quants", number, upload), len(quant_records), unit="quants")
+        for q in quant_records:
             # Update progress
-            progress = (i + 1) / len(quant_records)
-            progress_bar.progress(progress)
+            job.progress.advance()
             
             qty = q.get('quantity', 0)
             rqty = q.get('reserved_quantity', 0)
@@ -506,77 +2052,42 @@ def process_company_safe_relocation(models, uid):
                 skipped.append((lot_name, f"Reserved quantity = {rqty}"))
                 continue
             
-            valid_quants.append(q['id'])
-        
-        progress_bar.empty()
-        status_text.empty()
+            valid_quants.append((lot_name, q['id']))
         
-        # Create relocation wizard
+        # Execute: one relocation wizard per batch of quants, batches run in parallel
         if valid_quants:
-            try:
-                status_text.text("🚀 Creating relocation wizard...")
-                
-                ctx = {'action_ref': 'stock.action_view_inventory_tree'}
-                wizard_id = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    'stock.quant.relocate', 'create',
-                    [{
-                        'quant_ids': [(6, 0, valid_quants)],
-                        'dest_location_id': DEST_LOCATION_ID,
-                        'message': "Bulk Company-Safe Relocation via Streamlit Portal",
-                    }],
-                    {'context': ctx}
-                )
-                
-                # Execute the move
-                status_text.text("⚡ Executing relocation...")
-                models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    'stock.quant.relocate', 'action_relocate_quants',
-                    [[wizard_id]],
-                    {'context': ctx}
-                )
-                
-                log_entry = {
-                    'timestamp': datetime.now().strftime("%H:%M:%S"),
-                    'action': 'Relocation Executed',
-                    'details': f'Moved {len(valid_quants)} quants to location {DEST_LOCATION_ID}'
-                }
-                st.session_state.company_relocation_logs.append(log_entry)
-                
-                status_text.empty()
-                
-            except Exception as e:
-                st.error(f"❌ Error during relocation: {str(e)}")
-                skipped.extend([(f"Quant ID {qid}", f"Relocation failed: {str(e)}") for qid in valid_quants])
-                valid_quants = []
-        
-        # Store results
-        st.session_state.company_relocation_results = {
-            'success': valid_quants,
-            'success_count': len(valid_quants),
-            'failed': skipped,
-            'total': len(lots),
-            'timestamp': datetime.now(),
-            'source_locations': SOURCE_LOCATION_IDS,
-            'dest_location': DEST_LOCATION_ID
-        }
-        
-        # Clear temporary file from session state
-        if 'company_relocation_file' in st.session_state:
-            del st.session_state.company_relocation_file
-        
-        # Update processing state
-        st.session_state.company_relocation_processing = False
-        
-        # Force rerun to update UI
-        st.rerun()
-        
-    except Exception as e:
-        st.error(f"❌ Error during processing: {str(e)}")
-        st.session_state.company_relocation_processing = False
-        if 'company_relocation_file' in st.session_state:
-            del st.session_state.company_relocation_file
+            # Wizards are cut as they are submitted, at the current adaptive size
+            batches = chunked(valid_quants, lambda: relocate_control.batch_size)
+            job.progress.phase(batch_label("⚡ Relocating quants", number, upload), len(valid_quants), unit="quants")
+            wizards = len(run_parallel(batches, relocate_batch, on_result=on_result, controller=relocate_control))
+            
+            # Collect results per quant, in quant order
+            moved = 0
+            for lot_name, qid in valid_quants:
+                quant_error = quant_errors.pop(qid)
+                if quant_error is None:
+                    success.append(qid)
+                    moved += 1
+                else:
+                    skipped.append((f"{lot_name} (Quant {qid})", f"Relocation failed: {quant_error}"))
+            
+            job.logs.append(datetime.now().strftime("%H:%M:%S"), 'Relocation Executed', batch_label(f'Moved {moved} of {len(valid_quants)} quants to location {DEST_LOCATION_ID} in {wizards} wizards', number, upload))
+    
+    if read_error is not None:
+        job.logs.append(datetime.now().strftime("%H:%M:%S"), 'Read Failed', f'Stopped after {len(seen)} lots: {read_error}')
+    
+    return {
+        'success': success,
+        'success_count': len(success),
+        'failed': skipped,
+        'total': len(seen),
+        'missing_lots': missing_lots,
+        'error': read_error,
+        'run_id': uuid.uuid4().hex,
+        'timestamp': datetime.now(),
+        'source_locations': SOURCE_LOCATION_IDS,
+        'dest_location': DEST_LOCATION_ID
+    }
 
 def display_company_relocation_results():
     """Display company-safe relocation results"""
@@ -599,6 +2110,10 @@ def display_company_relocation_results():
         st.metric("Skipped", failure_count, delta_color="inverse")
     
     st.markdown(f"**Source Locations:** `{results['source_locations']}` → **Destination:** `{results['dest_location']}`")
+    if results.get('error'):
+        st.error(f"❌ Reading the file failed after {results['total']} lots, the rest was not processed: {results['error']}")
+    if results.get('missing_lots'):
+        st.warning(f"⚠️ {len(results['missing_lots'])} lots have no quant in the source locations (listed under Skipped)")
     
     # Detailed results in tabs
     tab1, tab2, tab3 = st.tabs(["✅ Success Details", "❌ Skipped Details", "📋 Processing Logs"])
@@ -616,10 +2131,10 @@ def display_company_relocation_results():
             st.dataframe(failed_df, use_container_width=True, height=400)
             
             # Download button
-            csv = failed_df.to_csv(index=False)
-            st.download_button(
+            lazy_download_button(
+                results['run_id'], "failed_csv",
+                lambda: failed_df.to_csv(index=False).encode('utf-8'),
                 label="📥 Download Skipped List",
-                data=csv,
                 file_name=f"skipped_relocation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True,
@@ -629,62 +2144,72 @@ def display_company_relocation_results():
             st.info("No lots were skipped during processing.")
     
     with tab3:
-        if st.session_state.company_relocation_logs:
-            log_df = pd.DataFrame(st.session_state.company_relocation_logs)
-            st.dataframe(log_df, use_container_width=True, height=300)
-        else:
-            st.info("No logs available.")
+        show_logs(st.session_state.company_relocation_logs, results['run_id'], "company_relocation_logs", height=300)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
 # ------------------------------------
 # TAB 2: UNCHECK IGNORED
 # ------------------------------------
-def show_uncheck_ignored_tab(models, uid):
+def show_uncheck_ignored_tab(odoo):
     """Display Uncheck Ignored functionality"""
     st.markdown("## 🔄 Uncheck Ignored QC Items")
     st.markdown("Remove ignored status from QC lines")
     st.markdown("---")
     
+    # Configuration Section
+    st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+    st.markdown("### ⚙️ Configuration Settings")
+    
+    uncheck_mode = st.radio(
+        "Resolution Mode",
+        options=[UNCHECK_MODE_PER_QC, UNCHECK_MODE_SEARCH],
+        horizontal=True,
+        help=(
+            "Per-QC index reads every line of each QC once. Server-side search looks up "
+            "only the listed lots and skips lines that are already active, which is "
+            "much cheaper for very large QCs and reruns."
+        ),
+        key="uncheck_mode_select"
+    )
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
     # File Upload Section
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    st.markdown("### 📤 Upload Excel File")
-    st.markdown("Excel file must contain columns: **QC_Name** and **Lot**")
+    st.markdown("### 📤 Upload File")
+    st.markdown("Excel, CSV or Parquet file must contain columns: **QC_Name** and **Lot**")
     
     uploaded_file = st.file_uploader(
-        "Choose an Excel file",
-        type=['xlsx', 'xls'],
+        "Choose a file",
+        type=UPLOAD_TYPES,
         help="Required columns: QC_Name, Lot",
         key="uncheck_ignored_uploader"
     )
     
     if uploaded_file is not None:
         try:
-            # Read and validate the Excel file
-            df = pd.read_excel(uploaded_file)
+            # Summarize and validate the file; the job streams the rows itself
+            upload, summary = read_upload(uploaded_file, ["QC_Name", "Lot"])
             
             # Check required columns
             required_cols = {"QC_Name", "Lot"}
-            if not required_cols.issubset(df.columns):
-                st.error("❌ Excel must contain columns: QC_Name, Lot")
+            if not required_cols.issubset(summary['columns']):
+                st.error("❌ File must contain columns: QC_Name, Lot")
                 st.markdown('</div>', unsafe_allow_html=True)
                 return
             
             # Display preview
             st.markdown("### 📋 Data Preview")
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(summary['head'].head(), use_container_width=True)
             
             # Statistics
             st.markdown("### 📊 Statistics")
-            col_stats1, col_stats2 = st.columns(2)
-            with col_stats1:
-                st.metric("Total Records", len(df))
-            with col_stats2:
-                st.metric("Unique QC References", df['QC_Name'].nunique())
+            show_upload_stats(summary, "Total Records", "Unique QC References", "QC_Name")
             
             # Sample data
             st.markdown("### 🎯 Sample Data")
-            st.code("\n".join([f"{row['QC_Name']} - {row['Lot']}" for _, row in df.head(5).iterrows()]))
+            st.code("\n".join([f"{row['QC_Name']} - {row['Lot']}" for _, row in summary['head'].head(5).iterrows()]))
             
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
@@ -698,190 +2223,335 @@ def show_uncheck_ignored_tab(models, uid):
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown("### 🚀 Actions")
         
-        col1, col2 = st.columns([1, 1])
+        # A journal left by an interrupted run of this file can be resumed
+        completed_units = RunJournal("Uncheck Ignored", upload['digest']).count()
+        
+        col1, col2, col3 = st.columns([1, 1, 1])
         with col1:
             if st.button("▶️ Start Unchecking Ignored", 
                         type="primary",
                         use_container_width=True,
+                        disabled=st.session_state.uncheck_job_id is not None,
                         key="start_uncheck_ignored"):
-                # Initialize processing state
-                st.session_state.uncheck_processing = True
-                st.session_state.uncheck_logs = []
-                st.session_state.uncheck_results = None
-                
-                # Store uploaded file in session state
-                st.session_state.uncheck_file = uploaded_file
-                
-                # Trigger rerun to start processing
+                # Run in the background; the session only keeps the job ID
+                start_job(
+                    "Uncheck Ignored", process_uncheck_ignored,
+                    odoo, upload, uncheck_mode
+                )
                 st.rerun()
         
         with col2:
-            if st.button("🔄 Reset", 
+            if st.button(f"⏭️ Resume ({completed_units} rows done)", 
                         use_container_width=True,
-                        key="reset_uncheck"):
-                # Clear uncheck state
-                st.session_state.uncheck_processing = False
-                st.session_state.uncheck_results = None
-                st.session_state.uncheck_logs = []
-                if 'uncheck_file' in st.session_state:
-                    del st.session_state.uncheck_file
-                st.rerun()
-        
-        # Show processing status
-        if st.session_state.uncheck_processing:
-            st.warning("⏳ Processing in progress... Please wait.")
-            
-            # Process the file if we're in processing state
-            if 'uncheck_file' in st.session_state:
-                process_uncheck_ignored(models, uid)
-        
-        st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Display results if available
-    if (st.session_state.uncheck_results is not None and 
-        not st.session_state.uncheck_processing):
-        display_uncheck_results()
-
-def process_uncheck_ignored(models, uid):
-    """Process uncheck ignored (FULL LOGIC)"""
-    try:
-        # Read the file for processing
-        uploaded_file = st.session_state.uncheck_file
-        df = pd.read_excel(uploaded_file)
-        
-        # Initialize results
-        processed = []
-        failed = []
-        not_found = []
-        
-        # Create progress bar and status
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Process each row
-        total_rows = len(df)
-        
-        for index, row in df.iterrows():
-            QC_NAME = str(row["QC_Name"]).strip()
-            TARGET_LOT = str(row["Lot"]).strip()
-            
-            # Update progress
-            progress = (index + 1) / total_rows
-            progress_bar.progress(progress)
-            status_text.text(f"Processing {index + 1}/{total_rows}: {QC_NAME} - {TARGET_LOT}")
-            
-            # Log entry
-            log_entry = {
-                'timestamp': datetime.now().strftime("%H:%M:%S"),
-                'qc': QC_NAME,
-                'lot': TARGET_LOT,
-                'status': 'Processing',
-                'message': 'Started processing'
-            }
-            st.session_state.uncheck_logs.append(log_entry)
-            
-            try:
-                # 1. Search QC
-                qc_ids = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    "stock.quantity.check", "search",
-                    [[("name", "=", QC_NAME)]]
+                        disabled=st.session_state.uncheck_job_id is not None or not completed_units,
+                        help="Continue an interrupted run of this file, skipping rows it already completed",
+                        key="resume_uncheck"):
+                start_job(
+                    "Uncheck Ignored", process_uncheck_ignored,
+                    odoo, upload, uncheck_mode, True
                 )
-                
-                if not qc_ids:
-                    not_found.append((QC_NAME, TARGET_LOT, "QC not found"))
-                    log_entry['status'] = 'Failed'
-                    log_entry['message'] = 'QC not found in Odoo'
-                    continue
-                
-                qc_id = qc_ids[0]
-                
-                # 2. Read QC lines
-                qc_record = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    "stock.quantity.check", "read",
-                    [qc_id],
-                    {"fields": ["qc_line_ids"]}
-                )[0]
-                
-                line_ids = qc_record.get("qc_line_ids", [])
-                
-                if not line_ids:
-                    not_found.append((QC_NAME, TARGET_LOT, "No lines in QC"))
-                    log_entry['status'] = 'Failed'
-                    log_entry['message'] = 'No lines inside QC'
-                    continue
-                
-                # 3. Read line details
-                lines = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    "stock.quantity.check.line", "read",
-                    [line_ids],
-                    {"fields": ["id", "name", "ignored"]}
-                )
-                
-                target_line_id = None
-                
-                for line in lines:
-                    if str(line["name"]).strip().upper() == TARGET_LOT.upper():
-                        target_line_id = line["id"]
-                        break
-                
-                if not target_line_id:
-                    not_found.append((QC_NAME, TARGET_LOT, "Lot not found in QC"))
-                    log_entry['status'] = 'Failed'
-                    log_entry['message'] = 'Lot not found in QC'
-                    continue
-                
-                # 4. Update ignored=False
-                update_result = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    "stock.quantity.check.line", "write",
-                    [[target_line_id], {"ignored": False}]
-                )
-                
-                if update_result:
-                    processed.append((QC_NAME, TARGET_LOT))
-                    log_entry['status'] = 'Success'
-                    log_entry['message'] = 'Successfully unchecked ignored'
-                else:
-                    failed.append((QC_NAME, TARGET_LOT, "Update failed"))
-                    log_entry['status'] = 'Failed'
-                    log_entry['message'] = 'Update failed in Odoo'
-                    
-            except Exception as e:
-                failed.append((QC_NAME, TARGET_LOT, str(e)))
-                log_entry['status'] = 'Failed'
-                log_entry['message'] = f'Exception: {str(e)}'
-        
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Store results
-        st.session_state.uncheck_results = {
-            'processed': processed,
-            'failed': failed,
-            'not_found': not_found,
-            'total': total_rows,
-            'timestamp': datetime.now()
-        }
-        
-        # Clear temporary file from session state
-        if 'uncheck_file' in st.session_state:
-            del st.session_state.uncheck_file
-        
-        # Update processing state
-        st.session_state.uncheck_processing = False
+                st.rerun()
         
-        # Force rerun to update UI
-        st.rerun()
+        with col3:
+            if st.button("🔄 Reset", 
+                        use_container_width=True,
+                        key="reset_uncheck"):
+                # Detach from the job (it keeps running, see the sidebar) and clear uncheck state
+                st.session_state.uncheck_job_id = None
+                clear_results('uncheck_results')
+                st.session_state.uncheck_logs = None
+                st.rerun()
         
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Follow the running job, if any
+    if st.session_state.uncheck_job_id is not None:
+        show_job_status("Uncheck Ignored")
+    show_job_failure("Uncheck Ignored")
+    
+    # Display results if available
+    if (st.session_state.uncheck_results is not None and 
+        st.session_state.uncheck_job_id is None):
+        display_uncheck_results()
+
+def resolve_qcs(odoo, qc_names, chunk_size=LOOKUP_CHUNK_SIZE):
+    """Map QC names to their qc_line_ids with chunked search_read calls"""
+    line_ids_by_qc = {}
+    for chunk in chunked(qc_names, chunk_size):
+        records = odoo.call(
+            "stock.quantity.check", "search_read",
+            [[("name", "in", chunk)]],
+            {"fields": ["name", "qc_line_ids"]}
+        )
+        for record in records:
+            # Keep the first match per name, like search()[0] did
+            line_ids_by_qc.setdefault(record["name"], record["qc_line_ids"])
+    return line_ids_by_qc
+
+def clear_ignored(odoo, line_ids):
+    """Set ignored=False on QC lines; retried on transient errors unless the failed write went through"""
+    return odoo.call(
+        "stock.quantity.check.line", "write",
+        [line_ids, {"ignored": False}],
+        applied=lambda: not odoo.call(
+            "stock.quantity.check.line", "search_count",
+            [[("id", "in", line_ids), ("ignored", "=", True)]]
+        )
+    )
+
+def uncheck_lines(odoo, line_ids):
+    """Clear the ignored flag on QC lines in one write, halving it on failure.
+    
+    Only the lines whose write fails are reported as failed. Returns
+    {line id: (outcome, reason, message)}.
+    """
+    not_updated = set()
+    
+    def clear(ids):
+        if not clear_ignored(odoo, ids):
+            not_updated.update(ids)
+    
+    outcomes = {}
+    for line_id, error in execute_with_bisection(list(dict.fromkeys(line_ids)), clear):
+        if error is not None:
+            outcomes[line_id] = ('failed', error, f'Exception: {error}')
+        elif line_id in not_updated:
+            outcomes[line_id] = ('failed', "Update failed", 'Update failed in Odoo')
+        else:
+            outcomes[line_id] = ('processed', None, 'Successfully unchecked ignored')
+    return outcomes
+
+def uncheck_qc_lots(odoo, line_ids, lots):
+    """Clear the ignored flag for several lots of one QC with a single write.
+    
+    A failed write is split so that only the rows of the failing lines fail.
+    
+    Returns one (outcome, reason, message) per lot, where outcome is
+    'processed', 'failed' or 'not_found'.
+    """
+    try:
+        lines = odoo.call(
+            "stock.quantity.check.line", "read",
+            [line_ids],
+            {"fields": ["id", "name", "ignored"]}
+        )
     except Exception as e:
-        st.error(f"❌ Error during processing: {str(e)}")
-        st.session_state.uncheck_processing = False
-        if 'uncheck_file' in st.session_state:
-            del st.session_state.uncheck_file
+        return [('failed', str(e), f'Exception: {str(e)}')] * len(lots)
+    
+    # Case-insensitive name -> line id index, first line wins
+    line_id_by_name = {}
+    for line in lines:
+        line_id_by_name.setdefault(str(line["name"]).strip().upper(), line["id"])
+    
+    target_line_ids = [line_id_by_name.get(lot.upper()) for lot in lots]
+    matched_ids = [line_id for line_id in target_line_ids if line_id]
+    outcome_by_line = uncheck_lines(odoo, matched_ids) if matched_ids else {}
+    
+    return [
+        outcome_by_line[line_id] if line_id else ('not_found', "Lot not found in QC", 'Lot not found in QC')
+        for line_id in target_line_ids
+    ]
+
+def plan_uncheck_by_qc(odoo, rows, outcomes):
+    """Plan Uncheck Ignored per QC: resolve each QC once, one write per QC.
+    
+    Fills `outcomes` for rows settled during planning and returns the
+    remaining (unit, work) pairs; each unit is (payload, row indexes).
+    """
+    rows_by_qc = {}
+    for index, (qc_name, _) in enumerate(rows):
+        rows_by_qc.setdefault(qc_name, []).append(index)
+    
+    line_ids_by_qc = resolve_qcs(odoo, list(rows_by_qc))
+    
+    groups = []
+    for qc_name, indexes in rows_by_qc.items():
+        if qc_name not in line_ids_by_qc:
+            outcome = ('not_found', "QC not found", 'QC not found in Odoo')
+        elif not line_ids_by_qc[qc_name]:
+            outcome = ('not_found', "No lines in QC", 'No lines inside QC')
+        else:
+            groups.append((line_ids_by_qc[qc_name], indexes))
+            continue
+        for index in indexes:
+            outcomes[index] = outcome
+    
+    def uncheck_group(group):
+        line_ids, indexes = group
+        return uncheck_qc_lots(odoo, line_ids, [rows[index][1] for index in indexes])
+    
+    return groups, uncheck_group
+
+def search_qc_lines(odoo, pairs, chunk_size=LOOKUP_CHUNK_SIZE):
+    """Fetch QC lines for (qc_id, lot) pairs with chunked search_read calls.
+    
+    Lot names are matched server-side with an OR of ilike terms, which also
+    catches names padded with spaces, then hash-joined locally on
+    (qc_id, stripped LOT), which drops the extra substring matches. Only id,
+    name, ignored and quantity_check_id are read.
+    """
+    lines_by_pair = {}
+    for chunk in chunked(sorted(pairs), chunk_size):
+        qc_ids = list({qc_id for qc_id, _ in chunk})
+        lot_names = sorted({lot for _, lot in chunk})
+        name_terms = ["|"] * (len(lot_names) - 1) + [("name", "ilike", lot) for lot in lot_names]
+        lines = odoo.call(
+            "stock.quantity.check.line", "search_read",
+            [[("quantity_check_id", "in", qc_ids)] + name_terms],
+            {"fields": ["id", "name", "ignored", "quantity_check_id"]}
+        )
+        for line in lines:
+            key = (line["quantity_check_id"][0], str(line["name"]).strip().upper())
+            lines_by_pair.setdefault(key, line)
+    return lines_by_pair
+
+def plan_uncheck_by_search(odoo, rows, outcomes, chunk_size=LOOKUP_CHUNK_SIZE):
+    """Plan Uncheck Ignored with server-side line search instead of full line reads.
+    
+    Lines that are already active are reported as processed without a write,
+    so reruns of the same file cost only the lookups. Same return value as
+    plan_uncheck_by_qc().
+    """
+    qc_names = list(dict.fromkeys(qc_name for qc_name, _ in rows))
+    qc_id_by_name = {}
+    for chunk in chunked(qc_names, chunk_size):
+        records = odoo.call(
+            "stock.quantity.check", "search_read",
+            [[("name", "in", chunk)]],
+            {"fields": ["name"]}
+        )
+        for record in records:
+            qc_id_by_name.setdefault(record["name"], record["id"])
+    
+    pairs = {
+        (qc_id_by_name[qc_name], lot.upper())
+        for qc_name, lot in rows if qc_name in qc_id_by_name
+    }
+    lines_by_pair = search_qc_lines(odoo, pairs, chunk_size)
+    
+    pending = []
+    for index, (qc_name, lot) in enumerate(rows):
+        line = lines_by_pair.get((qc_id_by_name.get(qc_name), lot.upper()))
+        if qc_name not in qc_id_by_name:
+            outcomes[index] = ('not_found', "QC not found", 'QC not found in Odoo')
+        elif line is None:
+            outcomes[index] = ('not_found', "Lot not found in QC", 'Lot not found in QC')
+        elif not line["ignored"]:
+            outcomes[index] = ('processed', None, 'Already unchecked, no update needed')
+        else:
+            pending.append((line["id"], index))
+    
+    batches = [
+        ([line_id for line_id, _ in batch], [index for _, index in batch])
+        for batch in chunked(pending, chunk_size)
+    ]
+    
+    def write_batch(batch):
+        line_ids, _ = batch
+        outcome_by_line = uncheck_lines(odoo, line_ids)
+        return [outcome_by_line[line_id] for line_id in line_ids]
+    
+    return batches, write_batch
+
+def process_uncheck_ignored(job, odoo, upload, uncheck_mode, resume=False):
+    """Uncheck ignored QC lines listed in an uploaded file (background job).
+    
+    The file is streamed in batches, each planned and written while the
+    next one is read. Unchecked rows are journaled; with `resume`, rows
+    unchecked by an earlier run of the same file are skipped without any
+    lookup.
+    """
+    journal = RunJournal("Uncheck Ignored", upload['digest'])
+    unchecked_before = journal.start(resume)
+    
+    # Initialize results
+    processed = []
+    failed = []
+    not_found = []
+    
+    total_rows = 0
+    resumed = 0
+    
+    # Rows are logged once settled, in file order, at the end of each batch
+    job.logs = LogStore(['timestamp', 'qc', 'lot', 'status', 'message'], categorical=['status'])
+    rows, todo, outcomes, settled_at = [], [], [], []
+    
+    def settle(positions, position_outcomes):
+        """Store outcomes of planned rows (positions in `todo`) and journal the unchecked ones"""
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        for position, outcome in zip(positions, position_outcomes):
+            outcomes[todo[position]] = outcome
+            settled_at[todo[position]] = timestamp
+        journal.record([
+            rows[todo[position]] for position, outcome in zip(positions, position_outcomes)
+            if outcome[0] == 'processed'
+        ])
+    
+    # Concurrency adapts to Odoo's response times; batch sizes follow the QCs
+    uncheck_control = AimdController("🎛️ Uncheck", odoo, (ODOO_MIN_WORKERS, ODOO_MAX_WORKERS))
+    job.controllers = [uncheck_control]
+    
+    def on_result(_, group, group_outcomes, error):
+        _, indexes = group
+        if error is not None:
+            group_outcomes = [('failed', str(error), f'Exception: {str(error)}')] * len(indexes)
+        settle(indexes, group_outcomes)
+        job.progress.advance(len(indexes))
+    
+    for number, batch in enumerate(prefetch(iter_upload_batches(upload, ["QC_Name", "Lot"])), 1):
+        # Rows of this batch; empty cells become empty names
+        rows = [(qc_name or '', lot or '') for qc_name, lot in zip(batch.get("QC_Name", []), batch.get("Lot", []))]
+        total_rows += len(rows)
+        outcomes = [None] * len(rows)
+        started_at = datetime.now().strftime("%H:%M:%S")
+        settled_at = [None] * len(rows)
+        
+        # Rows unchecked by an earlier run are settled; only the rest are planned
+        todo = []
+        for index, row in enumerate(rows):
+            if row in unchecked_before:
+                outcomes[index] = ('processed', None, 'Unchecked by an earlier run (resumed)')
+            else:
+                todo.append(index)
+        resumed += len(rows) - len(todo)
+        
+        # Plan: resolve QCs and lines, settling rows that need no write
+        job.progress.phase(batch_label(f"🔍 Resolving {len(todo)} rows", number, upload))
+        todo_rows = [rows[index] for index in todo]
+        todo_outcomes = [None] * len(todo)
+        if uncheck_mode == UNCHECK_MODE_SEARCH:
+            groups, uncheck_group = plan_uncheck_by_search(odoo, todo_rows, todo_outcomes)
+        else:
+            groups, uncheck_group = plan_uncheck_by_qc(odoo, todo_rows, todo_outcomes)
+        settled = [position for position, outcome in enumerate(todo_outcomes) if outcome is not None]
+        settle(settled, [todo_outcomes[position] for position in settled])
+        
+        # Run the writes on the worker pool; progress updates on this thread
+        job.progress.phase(
+            batch_label(f"✏️ Unchecking in {len(groups)} batches", number, upload),
+            sum(len(indexes) for _, indexes in groups), unit="rows"
+        )
+        run_parallel(groups, uncheck_group, on_result=on_result, controller=uncheck_control)
+        
+        # Collect results in file order
+        for (QC_NAME, TARGET_LOT), timestamp, (outcome, reason, message) in zip(rows, settled_at, outcomes):
+            if outcome == 'processed':
+                processed.append((QC_NAME, TARGET_LOT))
+            elif outcome == 'not_found':
+                not_found.append((QC_NAME, TARGET_LOT, reason))
+            else:
+                failed.append((QC_NAME, TARGET_LOT, reason))
+            job.logs.append(timestamp or started_at, QC_NAME, TARGET_LOT, 'Success' if outcome == 'processed' else 'Failed', message)
+    
+    return {
+        'processed': processed,
+        'failed': failed,
+        'not_found': not_found,
+        'resumed': resumed,
+        'total': total_rows,
+        'run_id': uuid.uuid4().hex,
+        'timestamp': datetime.now()
+    }
 
 def display_uncheck_results():
     """Display uncheck ignored results"""
@@ -901,6 +2571,9 @@ def display_uncheck_results():
     with col4:
         st.metric("Not Found", len(results['not_found']))
     
+    if results.get('resumed'):
+        st.caption(f"⏭️ Resumed: {results['resumed']} rows were already unchecked by an earlier run")
+    
     # Detailed results in tabs
     tab1, tab2, tab3, tab4 = st.tabs(["✅ Processed", "❌ Failed", "🔍 Not Found", "📋 Logs"])
     
@@ -910,10 +2583,10 @@ def display_uncheck_results():
             st.dataframe(processed_df, use_container_width=True, height=400)
             
             # Download button
-            csv = processed_df.to_csv(index=False)
-            st.download_button(
+            lazy_download_button(
+                results['run_id'], "processed_csv",
+                lambda: processed_df.to_csv(index=False).encode('utf-8'),
                 label="📥 Download Processed List",
-                data=csv,
                 file_name=f"processed_uncheck_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True,
@@ -928,10 +2601,10 @@ def display_uncheck_results():
             st.dataframe(failed_df, use_container_width=True, height=400)
             
             # Download button
-            csv = failed_df.to_csv(index=False)
-            st.download_button(
+            lazy_download_button(
+                results['run_id'], "failed_csv",
+                lambda: failed_df.to_csv(index=False).encode('utf-8'),
                 label="📥 Download Failed List",
-                data=csv,
                 file_name=f"failed_uncheck_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True,
@@ -946,10 +2619,10 @@ def display_uncheck_results():
             st.dataframe(not_found_df, use_container_width=True, height=400)
             
             # Download button
-            csv = not_found_df.to_csv(index=False)
-            st.download_button(
+            lazy_download_button(
+                results['run_id'], "not_found_csv",
+                lambda: not_found_df.to_csv(index=False).encode('utf-8'),
                 label="📥 Download Not Found List",
-                data=csv,
                 file_name=f"notfound_uncheck_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True,
@@ -959,18 +2632,225 @@ def display_uncheck_results():
             st.info("All records were found in the system.")
     
     with tab4:
-        if st.session_state.uncheck_logs:
-            log_df = pd.DataFrame(st.session_state.uncheck_logs)
-            st.dataframe(log_df, use_container_width=True, height=400)
-        else:
-            st.info("No logs available.")
+        show_logs(st.session_state.uncheck_logs, results['run_id'], "uncheck_logs")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
 # ------------------------------------
 # TAB 3: QC DATA EXPORT
 # ------------------------------------
-def show_qc_export_tab(models, uid):
+QC_LINE_FIELDS = ["name", "product_id", "categ_id", "ignored", "create_date", "write_date"]
+
+def iter_qc_line_pages(odoo, qc_id, page_size=None, domain=()):
+    """Yield a QC's lines (optionally filtered by `domain`) page by page with id-ordered search_read calls"""
+    page_size = page_size or QC_PAGE_SIZE
+    last_id = 0
+    while True:
+        # Keyset paging on id stays cheap on deep pages, unlike a growing OFFSET
+        page = odoo.call(
+            "stock.quantity.check.line", "search_read",
+            [[("quantity_check_id", "=", qc_id), ("id", ">", last_id)] + list(domain)],
+            {"fields": QC_LINE_FIELDS, "order": "id", "limit": page_size}
+        )
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+class QCLineCache:
+    """SQLite store of QC lines, shared by all sessions and kept across restarts.
+    
+    A sync only downloads lines written after the QC's cached high-water
+    mark (see sync_mark()). The cached and server line counts are then compared,
+    and only when they differ is the ID list fetched to drop deleted lines
+    and pick up any that were missed. A full sync downloads every line
+    again and drops the cached lines the server no longer has.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.guard = threading.Lock()
+        self.qc_locks = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS qc_line (
+                    id INTEGER PRIMARY KEY,
+                    qc_id INTEGER NOT NULL,
+                    name TEXT,
+                    product TEXT,
+                    category TEXT,
+                    ignored INTEGER,
+                    create_date TEXT,
+                    write_date TEXT
+                );
+                CREATE INDEX IF NOT EXISTS qc_line_qc_id ON qc_line (qc_id);
+                CREATE TABLE IF NOT EXISTS qc_sync (
+                    qc_id INTEGER PRIMARY KEY,
+                    high_water TEXT
+                );
+            """)
+    
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _qc_lock(self, qc_id):
+        with self.guard:
+            return self.qc_locks.setdefault(qc_id, threading.Lock())
+    
+    def sync(self, odoo, qc_id, full=False):
+        """Bring a QC's cached lines up to date, yielding each downloaded page"""
+        with self._qc_lock(qc_id):
+            with self._connect() as conn:
+                row = None if full else conn.execute("SELECT high_water FROM qc_sync WHERE qc_id = ?", (qc_id,)).fetchone()
+            high_water = row[0] if row else None
+            
+            domain = [("write_date", ">", high_water)] if high_water else []
+            downloaded, started = set(), None
+            for page in iter_qc_line_pages(odoo, qc_id, domain=domain):
+                started = started or odoo.server_time()
+                self._store(qc_id, page)
+                downloaded.update(line["id"] for line in page)
+                high_water = max([high_water or ""] + [line.get("write_date") or "" for line in page])
+                yield page
+            mark = sync_mark(high_water, started or odoo.server_time())
+            
+            if row:
+                self._reconcile(odoo, qc_id)
+            elif full:
+                # Cached lines the full download did not return were deleted in Odoo
+                with self._connect() as conn:
+                    cached_ids = {line_id for (line_id,) in conn.execute("SELECT id FROM qc_line WHERE qc_id = ?", (qc_id,))}
+                    conn.executemany("DELETE FROM qc_line WHERE id = ?", [(line_id,) for line_id in cached_ids - downloaded])
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO qc_sync VALUES (?, ?)", (qc_id, mark))
+    
+    def _store(self, qc_id, lines):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO qc_line VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(
+                    line["id"], qc_id,
+                    line["name"] or None,
+                    line["product_id"][1] if line.get("product_id") else None,
+                    line["categ_id"][1] if line.get("categ_id") else None,
+                    int(bool(line.get("ignored"))),
+                    line.get("create_date") or None,
+                    line.get("write_date") or None,
+                ) for line in lines]
+            )
+    
+    def _reconcile(self, odoo, qc_id):
+        # Cheap check first: equal counts mean nothing was deleted or missed
+        server_count = odoo.call(
+            "stock.quantity.check.line", "search_count",
+            [[("quantity_check_id", "=", qc_id)]]
+        )
+        with self._connect() as conn:
+            cached_ids = {line_id for (line_id,) in conn.execute("SELECT id FROM qc_line WHERE qc_id = ?", (qc_id,))}
+        if len(cached_ids) == server_count:
+            return
+        
+        server_ids = set(odoo.call(
+            "stock.quantity.check.line", "search",
+            [[("quantity_check_id", "=", qc_id)]]
+        ))
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM qc_line WHERE id = ?", [(line_id,) for line_id in cached_ids - server_ids])
+        
+        # Lines committed late with a write_date older than the high-water mark
+        for chunk in chunked(sorted(server_ids - cached_ids), LOOKUP_CHUNK_SIZE):
+            self._store(qc_id, odoo.call(
+                "stock.quantity.check.line", "read",
+                [chunk],
+                {"fields": QC_LINE_FIELDS}
+            ))
+    
+    def frame(self, qc_id, reference):
+        """Return a QC's cached lines as an export DataFrame"""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                """
+                SELECT ? AS "Reference",
+                       COALESCE(name, 'N/A') AS "Serial",
+                       COALESCE(product, 'Unknown') AS "Product",
+                       COALESCE(category, 'Uncategorized') AS "Category",
+                       CASE WHEN ignored THEN 'Ignored' ELSE 'Active' END AS "Status",
+                       COALESCE(substr(create_date, 1, instr(create_date || ' ', ' ') - 1), '') AS "Date"
+                FROM qc_line WHERE qc_id = ? ORDER BY id
+                """,
+                conn, params=(reference, qc_id)
+            )
+
+@st.cache_resource(show_spinner=False)
+def qc_line_cache():
+    """QC line cache shared by all sessions"""
+    return QCLineCache(QC_CACHE_PATH)
+
+def write_excel_file(sheets):
+    """Write {sheet name: DataFrame} to a temporary .xlsx file and return its path.
+    
+    Uses xlsxwriter's constant_memory mode, which flushes each row to disk as
+    it is written, so memory stays flat no matter how many rows are exported.
+    """
+    fd, path = export_file(".xlsx")
+    os.close(fd)
+    
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, list(df.columns), header_format)
+        for row_index, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            worksheet.write_row(row_index, 0, row)
+    workbook.close()
+    return path
+
+def excel_sheet_name(name, used):
+    """Make a valid, unique Excel sheet name (31 chars max, no []:*?/\\)"""
+    base = re.sub(r'[\[\]:*?/\\]', '_', name)[:31] or "Sheet"
+    candidate, number = base, 2
+    while candidate.lower() in used:
+        suffix = f" ({number})"
+        candidate = base[:31 - len(suffix)] + suffix
+        number += 1
+    used.add(candidate.lower())
+    return candidate
+
+def qc_sheets(df):
+    """Split a combined QC export into {sheet name: DataFrame}, one sheet per QC"""
+    used = set()
+    return {
+        excel_sheet_name(reference, used): frame
+        for reference, frame in df.groupby("Reference", sort=False)
+    }
+
+def fetch_qc_frame(odoo, qc_id, reference, cache, full=False):
+    """Bring one QC's cached lines up to date and return them as an export DataFrame"""
+    for _ in cache.sync(odoo, qc_id, full):
+        pass
+    return cache.frame(qc_id, reference)
+
+def qc_lines_to_rows(lines, reference):
+    """Convert QC line records into export rows"""
+    return [{
+        "Reference": reference,
+        "Serial": l.get("name", "N/A"),
+        "Product": l["product_id"][1] if l.get("product_id") else "Unknown",
+        "Category": l["categ_id"][1] if l.get("categ_id") else "Uncategorized",
+        "Status": "Ignored" if l.get("ignored") else "Active",
+        "Date": (l.get("create_date") or "").split(" ")[0]
+    } for l in lines]
+
+def show_qc_export_tab(odoo):
     """Display QC Export functionality"""
     st.markdown("## 📊 Quality Control Dashboard")
     st.markdown("Export and analyze QC data with ease")
@@ -980,140 +2860,90 @@ def show_qc_export_tab(models, uid):
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
     st.markdown("### 🔍 Search QC Records")
     
-    with st.spinner("⏳ Loading QC records..."):
-        qc_names = fetch_qc_list(models, uid, ODOO_ADMIN_PASSWORD)
+    index = qc_name_index()
+    try:
+        with st.spinner("⏳ Loading QC records..."):
+            index.sync(odoo)
+    except Exception as e:
+        # Searches keep using the last synced snapshot
+        st.error(f"❌ Could not refresh QC records from Odoo: {str(e)}")
     
-    if not qc_names:
+    if not len(index):
         st.warning("⚠️ No QC records found in Odoo.")
         st.markdown('</div>', unsafe_allow_html=True)
         return
     
+    qc_query = st.text_input(
+        "Search QC References",
+        placeholder="🔎 Type part of a QC reference to search all records...",
+        label_visibility="collapsed",
+        key="qc_search"
+    )
+    qc_names = index.search(qc_query, limit=QC_SEARCH_LIMIT)
+    st.caption(f"Showing {len(qc_names)} of {len(index)} QC references")
+    
+    multi_mode = st.toggle(
+        "Export multiple QCs",
+        help="Fetch several QC references in parallel into one combined export",
+        key="qc_multi_mode"
+    )
+    
     c1, c2 = st.columns([4, 1])
     with c1:
-        display_options = ["🔎 Select or type to search..."] + qc_names
-        selected_option = st.selectbox(
-            "QC Reference", 
-            options=display_options,
-            label_visibility="collapsed",
-            key="qc_selectbox"
-        )
-        
-        if selected_option == "🔎 Select or type to search...":
-            selected_qc = None
+        if multi_mode:
+            # Keep earlier picks selectable while the search text changes
+            selected_before = st.session_state.get("qc_multiselect", [])
+            selected_qcs = st.multiselect(
+                "QC References",
+                options=list(dict.fromkeys(selected_before + qc_names)),
+                placeholder="🔎 Select or type to search...",
+                label_visibility="collapsed",
+                key="qc_multiselect"
+            )
         else:
-            selected_qc = selected_option
+            display_options = ["🔎 Select or type to search..."] + qc_names
+            selected_option = st.selectbox(
+                "QC Reference", 
+                options=display_options,
+                label_visibility="collapsed",
+                key="qc_selectbox"
+            )
+            
+            if selected_option == "🔎 Select or type to search...":
+                selected_qcs = []
+            else:
+                selected_qcs = [selected_option]
             
     with c2:
         st.markdown("<div style='height: 6px'></div>", unsafe_allow_html=True)
         fetch_btn = st.button("🚀 Fetch Data", use_container_width=True, key="fetch_qc_data", type="primary")
+    
+    full_resync = st.checkbox(
+        "♻️ Full resync",
+        help="Download every line of the selected QCs again instead of only the lines changed since the last fetch",
+        key="qc_full_resync"
+    )
         
     st.markdown('</div>', unsafe_allow_html=True)
     
     # Data Section
-    if fetch_btn and selected_qc:
+    if fetch_btn and selected_qcs:
         try:
-            with st.spinner(f"⏳ Fetching data for {selected_qc}..."):
-                qc_ids = models.execute_kw(ODOO_DB, uid, ODOO_ADMIN_PASSWORD, 
-                                          "stock.quantity.check", "search", 
-                                          [[("name", "=", selected_qc)]])
-                
-                if not qc_ids:
-                    st.error("❌ Reference not found in database.")
-                    return
-                    
-                line_ids = models.execute_kw(ODOO_DB, uid, ODOO_ADMIN_PASSWORD, 
-                                            "stock.quantity.check.line", "search", 
-                                            [[("quantity_check_id", "=", qc_ids[0])]])
+            if multi_mode:
+                selected_qc = f"{len(selected_qcs)} QCs"
+                df = load_multiple_qcs(odoo, selected_qcs, full_resync)
+            else:
+                selected_qc = selected_qcs[0]
+                df = load_single_qc(odoo, selected_qc, full_resync)
+            
+            if df is not None:
+                evict_downloads(st.session_state.qc_run_id)
+                st.session_state.qc_data = df
+                st.session_state.qc_selected = selected_qc
+                st.session_state.qc_run_id = uuid.uuid4().hex
                 
-                if not line_ids:
-                    st.info("⚠️ This QC reference has no product lines.")
-                else:
-                    lines = models.execute_kw(
-                        ODOO_DB, uid, ODOO_ADMIN_PASSWORD, 
-                        "stock.quantity.check.line", "read", 
-                        [line_ids], 
-                        {"fields": ["name", "product_id", "categ_id", "ignored", "create_date"]}
-                    )
-                    
-                    data = []
-                    for l in lines:
-                        data.append({
-                            "Reference": selected_qc,
-                            "Serial": l.get("name", "N/A"),
-                            "Product": l["product_id"][1] if l.get("product_id") else "Unknown",
-                            "Category": l["categ_id"][1] if l.get("categ_id") else "Uncategorized",
-                            "Status": "Ignored" if l.get("ignored") else "Active",
-                            "Date": l.get("create_date", "").split(" ")[0]
-                        })
-                    
-                    df = pd.DataFrame(data)
-                    st.session_state.qc_data = df
-                    st.session_state.qc_selected = selected_qc
-                    
-                    # Analytics Overview
-                    st.markdown("### 📈 Analytics Overview")
-                    m1, m2, m3, m4 = st.columns(4)
-                    
-                    with m1:
-                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                        st.metric("📦 Total Items", len(df))
-                        st.markdown('</div>', unsafe_allow_html=True)
-                        
-                    with m2:
-                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                        st.metric("✅ Active", len(df[df["Status"]=="Active"]))
-                        st.markdown('</div>', unsafe_allow_html=True)
-                        
-                    with m3:
-                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                        st.metric("⛔ Ignored", len(df[df["Status"]=="Ignored"]))
-                        st.markdown('</div>', unsafe_allow_html=True)
-                        
-                    with m4:
-                        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-                        st.metric("🏷️ Categories", df["Category"].nunique())
-                        st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    st.markdown("<br>", unsafe_allow_html=True)
-                    
-                    # Detailed Records
-                    st.markdown("### 📋 Detailed Records")
-                    st.dataframe(df, height=400, use_container_width=True)
-                    
-                    # Export Options
-                    st.markdown("---")
-                    st.markdown("### 📥 Export Options")
-                    st.caption("Download your data in multiple formats")
-                    
-                    d1, d2, d3 = st.columns([1, 1, 2])
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-                    
-                    with d1:
-                        csv = df.to_csv(index=False).encode('utf-8')
-                        st.download_button(
-                            label="📄 Download CSV",
-                            data=csv,
-                            file_name=f"{selected_qc}_{timestamp}.csv",
-                            mime="text/csv",
-                            use_container_width=True,
-                            key="download_csv_qc"
-                        )
-                        
-                    with d2:
-                        buffer = io.BytesIO()
-                        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                            df.to_excel(writer, index=False, sheet_name='QC Data')
-                        st.download_button(
-                            label="📊 Download Excel",
-                            data=buffer.getvalue(),
-                            file_name=f"{selected_qc}_{timestamp}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            use_container_width=True,
-                            key="download_excel_qc"
-                        )
-                    
-                    with d3:
-                        st.success(f"✅ Successfully loaded {len(df)} records from {selected_qc}")
+                with display_qc_data(df, selected_qc):
+                    st.success(f"✅ Successfully loaded {len(df)} records from {selected_qc}")
                         
         except Exception as e:
             st.error(f"❌ System Error: {str(e)}")
@@ -1126,77 +2956,189 @@ def show_qc_export_tab(models, uid):
         
         st.info(f"📊 Showing cached data for: {selected_qc}")
         
-        # Analytics Overview
-        st.markdown("### 📈 Analytics Overview")
-        m1, m2, m3, m4 = st.columns(4)
+        with display_qc_data(df, selected_qc, key_suffix="_cached"):
+            st.button("🔄 Refresh Data", 
+                     on_click=clear_qc_data,
+                     use_container_width=True,
+                     key="refresh_qc_data")
+    
+    # Compare the wire protocols on a typical large read
+    with st.expander("🧪 Transport Benchmark"):
+        st.caption(f"Reads the latest {QC_PAGE_SIZE} QC lines over XML-RPC and JSON-RPC. "
+                   f"This portal uses **{odoo.protocol}** (set ODOO_PROTOCOL to change).")
+        if st.button("▶️ Run Benchmark", key="run_transport_benchmark"):
+            try:
+                with st.spinner("⏳ Benchmarking..."):
+                    comparison = benchmark_protocols(
+                        odoo, "stock.quantity.check.line", "search_read", [[]],
+                        {"fields": QC_LINE_FIELDS, "order": "id desc", "limit": QC_PAGE_SIZE}
+                    )
+                st.dataframe(comparison, hide_index=True, use_container_width=True)
+            except Exception as e:
+                st.error(f"❌ Benchmark failed: {str(e)}")
+
+def load_single_qc(odoo, selected_qc, full=False):
+    """Fetch one QC, previewing downloaded pages in a live table; returns None if nothing to show"""
+    with st.spinner(f"⏳ Fetching data for {selected_qc}..."):
+        qc_ids = odoo.call("stock.quantity.check", "search", [[("name", "=", selected_qc)]])
         
-        with m1:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("📦 Total Items", len(df))
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-        with m2:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("✅ Active", len(df[df["Status"]=="Active"]))
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-        with m3:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("⛔ Ignored", len(df[df["Status"]=="Ignored"]))
-            st.markdown('</div>', unsafe_allow_html=True)
+        if not qc_ids:
+            st.error("❌ Reference not found in database.")
+            return None
             
-        with m4:
-            st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("🏷️ Categories", df["Category"].nunique())
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        st.markdown("<br>", unsafe_allow_html=True)
+        # Sync the local cache; while it runs, show a line count and the latest page,
+        # refreshed at most every QC_PREVIEW_SECONDS
+        downloaded = 0
+        refreshed_at = 0.0
+        live_table = st.empty()
+        cache = qc_line_cache()
+        for page in cache.sync(odoo, qc_ids[0], full):
+            downloaded += len(page)
+            if time.monotonic() - refreshed_at < QC_PREVIEW_SECONDS:
+                continue
+            with live_table.container():
+                st.caption(f"⏳ Downloaded {downloaded:,} new or changed lines so far... (latest page below)")
+                st.dataframe(pd.DataFrame(qc_lines_to_rows(page, selected_qc)), height=400, use_container_width=True)
+            refreshed_at = time.monotonic()
+        live_table.empty()
+        
+        df = cache.frame(qc_ids[0], selected_qc)
+        if df.empty:
+            st.info("⚠️ This QC reference has no product lines.")
+            return None
+        return df
+
+def load_multiple_qcs(odoo, selected_qcs, full=False):
+    """Fetch several QCs concurrently into one combined DataFrame"""
+    records = odoo.call(
+        "stock.quantity.check", "search_read",
+        [[("name", "in", selected_qcs)]],
+        {"fields": ["name"]}
+    )
+    qc_id_by_name = {}
+    for record in records:
+        qc_id_by_name.setdefault(record["name"], record["id"])
+    
+    found = [name for name in selected_qcs if name in qc_id_by_name]
+    missing = [name for name in selected_qcs if name not in qc_id_by_name]
+    if missing:
+        st.warning(f"⚠️ Not found in database: {', '.join(missing)}")
+    if not found:
+        return None
+    
+    # Each QC is fetched page by page on its own worker
+    progress, progress_bar = progress_bar_reporter()
+    progress.phase("⏳ Fetching QCs", len(found), unit="QCs")
+    
+    def on_result(*_):
+        progress.advance()
+    
+    cache = qc_line_cache()
+    results = run_parallel(
+        found,
+        lambda name: fetch_qc_frame(odoo, qc_id_by_name[name], name, cache, full),
+        on_result=on_result
+    )
+    progress_bar.empty()
+    
+    frames = []
+    for name, (frame, error) in zip(found, results):
+        if error is not None:
+            st.error(f"❌ Failed to fetch {name}: {str(error)}")
+        else:
+            frames.append(frame)
+    
+    df = pd.concat(frames, ignore_index=True) if frames else None
+    if df is None or df.empty:
+        st.info("⚠️ The selected QC references have no product lines.")
+        return None
+    return df
+
+def display_qc_data(df, selected_qc, key_suffix=""):
+    """Render analytics, records and export options for fetched QC data.
+    
+    Returns the free column next to the download buttons for a status widget.
+    """
+    # Analytics Overview
+    st.markdown("### 📈 Analytics Overview")
+    m1, m2, m3, m4 = st.columns(4)
+    
+    with m1:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("📦 Total Items", len(df))
+        st.markdown('</div>', unsafe_allow_html=True)
         
-        # Detailed Records
-        st.markdown("### 📋 Detailed Records")
-        st.dataframe(df, height=400, use_container_width=True)
+    with m2:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("✅ Active", len(df[df["Status"]=="Active"]))
+        st.markdown('</div>', unsafe_allow_html=True)
         
-        # Export Options
-        st.markdown("---")
-        st.markdown("### 📥 Export Options")
+    with m3:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("⛔ Ignored", len(df[df["Status"]=="Ignored"]))
+        st.markdown('</div>', unsafe_allow_html=True)
         
-        d1, d2, d3 = st.columns([1, 1, 2])
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    with m4:
+        st.markdown('<div class="metric-card">', unsafe_allow_html=True)
+        st.metric("🏷️ Categories", df["Category"].nunique())
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Detailed Records
+    st.markdown("### 📋 Detailed Records")
+    st.dataframe(df, height=400, use_container_width=True)
+    
+    # Export Options
+    st.markdown("---")
+    st.markdown("### 📥 Export Options")
+    st.caption("Download your data in multiple formats")
+    
+    multi_qc = df["Reference"].nunique() > 1
+    columns = st.columns([1, 1, 1, 1] if multi_qc else [1, 1, 2])
+    file_stem = selected_qc.replace(" ", "_")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    
+    with columns[0]:
+        lazy_download_button(
+            st.session_state.qc_run_id, "csv",
+            lambda: df.to_csv(index=False).encode('utf-8'),
+            label="📄 Download CSV",
+            file_name=f"{file_stem}_{timestamp}.csv",
+            mime="text/csv",
+            use_container_width=True,
+            key=f"download_csv_qc{key_suffix}"
+        )
         
-        with d1:
-            csv = df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="📄 Download CSV",
-                data=csv,
-                file_name=f"{selected_qc}_{timestamp}.csv",
-                mime="text/csv",
-                use_container_width=True,
-                key="download_csv_qc_cached"
-            )
-            
-        with d2:
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='QC Data')
-            st.download_button(
-                label="📊 Download Excel",
-                data=buffer.getvalue(),
-                file_name=f"{selected_qc}_{timestamp}.xlsx",
+    with columns[1]:
+        lazy_download_button(
+            st.session_state.qc_run_id, "xlsx",
+            lambda: write_excel_file({'QC Data': df}),
+            label="📊 Download Excel",
+            file_name=f"{file_stem}_{timestamp}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True,
+            key=f"download_excel_qc{key_suffix}"
+        )
+    
+    if multi_qc:
+        with columns[2]:
+            lazy_download_button(
+                st.session_state.qc_run_id, "xlsx_per_qc",
+                lambda: write_excel_file(qc_sheets(df)),
+                label="📚 Sheet per QC",
+                file_name=f"{file_stem}_by_qc_{timestamp}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 use_container_width=True,
-                key="download_excel_qc_cached"
+                key=f"download_sheets_qc{key_suffix}"
             )
-        
-        with d3:
-            st.button("🔄 Refresh Data", 
-                     on_click=lambda: st.session_state.update({"qc_data": None, "qc_selected": None}),
-                     use_container_width=True,
-                     key="refresh_qc_data")
+    
+    return columns[-1]
 
 # ------------------------------------
 # TAB 4: BULK RELOCATION
 # ------------------------------------
-def show_bulk_relocation_tab(models, uid):
+def show_bulk_relocation_tab(odoo):
     """Display Bulk Relocation functionality"""
     st.markdown("## 📦 Bulk Relocation Tool")
     st.markdown("Mass relocate lots to destination locations")
@@ -1206,7 +3148,7 @@ def show_bulk_relocation_tab(models, uid):
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
     st.markdown("### ⚙️ Relocation Settings")
     
-    col1, col2 = st.columns(2)
+    col1, col2, col3 = st.columns(3)
     with col1:
         DEST_LOCATION_ID = st.number_input(
             "Destination Location ID",
@@ -1216,6 +3158,14 @@ def show_bulk_relocation_tab(models, uid):
             key="dest_location_id"
         )
     with col2:
+        QUANTS_PER_WIZARD = st.number_input(
+            "Quants per Wizard",
+            min_value=1,
+            value=RELOCATE_CHUNK_SIZE,
+            help="Most quants moved by each relocation wizard; wizards shrink while Odoo responds slowly. Set to 1 to relocate lot by lot.",
+            key="relocation_chunk_size"
+        )
+    with col3:
         st.markdown("<br>", unsafe_allow_html=True)
         st.info(f"📍 Lots will be relocated to Location ID: **{DEST_LOCATION_ID}**")
     
@@ -1223,40 +3173,36 @@ def show_bulk_relocation_tab(models, uid):
     
     # File Upload Section
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    st.markdown("### 📤 Upload Excel File")
+    st.markdown("### 📤 Upload Lot File")
     
     uploaded_file = st.file_uploader(
-        "Choose an Excel file with 'Lot' column",
-        type=['xlsx', 'xls'],
-        help="Excel file must contain a column named 'Lot'",
+        "Choose an Excel, CSV or Parquet file with 'Lot' column",
+        type=UPLOAD_TYPES,
+        help="File must contain a column named 'Lot'",
         key="relocation_uploader"
     )
     
     if uploaded_file is not None:
         try:
-            # Read and validate the Excel file
-            df = pd.read_excel(uploaded_file)
+            # Summarize and validate the file; the job streams the rows itself
+            upload, summary = read_upload(uploaded_file, ["Lot"])
             
-            if 'Lot' not in df.columns:
-                st.error("❌ Excel file must contain a column named 'Lot'")
+            if 'Lot' not in summary['columns']:
+                st.error("❌ File must contain a column named 'Lot'")
                 st.markdown('</div>', unsafe_allow_html=True)
                 return
             
             # Display preview
             st.markdown("### 📋 Data Preview")
-            st.dataframe(df.head(), use_container_width=True)
+            st.dataframe(summary['head'].head(), use_container_width=True)
             
             # Statistics
             st.markdown("### 📊 Statistics")
-            col_stats1, col_stats2 = st.columns(2)
-            with col_stats1:
-                st.metric("Total Lots", len(df))
-            with col_stats2:
-                st.metric("Unique Lots", df['Lot'].nunique())
+            show_upload_stats(summary, "Total Lots", "Unique Lots", "Lot")
             
             # Sample lots
             st.markdown("### 🎯 Sample Lots")
-            st.code("\n".join(df['Lot'].dropna().head(10).astype(str).tolist()))
+            st.code("\n".join(summary['head']['Lot'].dropna().tolist()))
             
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
@@ -1270,181 +3216,204 @@ def show_bulk_relocation_tab(models, uid):
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
         st.markdown("### 🚀 Actions")
         
-        col1, col2 = st.columns([1, 1])
+        # A journal left by an interrupted run of this file can be resumed
+        completed_units = RunJournal("Bulk Relocation", upload['digest'], DEST_LOCATION_ID).count()
+        
+        col1, col2, col3 = st.columns([1, 1, 1])
         with col1:
             if st.button("▶️ Start Relocation", 
                         type="primary",
                         use_container_width=True,
+                        disabled=st.session_state.relocation_job_id is not None,
                         key="start_relocation"):
-                # Initialize processing state
-                st.session_state.relocation_processing = True
-                st.session_state.relocation_logs = []
-                st.session_state.relocation_results = None
-                
-                # Store uploaded file in session state for processing
-                st.session_state.relocation_file = uploaded_file
-                st.session_state.relocation_dest_id = DEST_LOCATION_ID
-                
-                # Trigger rerun to start processing
+                # Run in the background; the session only keeps the job ID
+                start_job(
+                    "Bulk Relocation", process_relocation_file,
+                    odoo, upload, DEST_LOCATION_ID, QUANTS_PER_WIZARD
+                )
                 st.rerun()
         
         with col2:
+            if st.button(f"⏭️ Resume ({completed_units} lots done)", 
+                        use_container_width=True,
+                        disabled=st.session_state.relocation_job_id is not None or not completed_units,
+                        help="Continue an interrupted run of this file, skipping lots it already completed",
+                        key="resume_relocation"):
+                start_job(
+                    "Bulk Relocation", process_relocation_file,
+                    odoo, upload, DEST_LOCATION_ID, QUANTS_PER_WIZARD, True
+                )
+                st.rerun()
+        
+        with col3:
             if st.button("🔄 Reset", 
                         use_container_width=True,
                         key="reset_relocation"):
-                # Clear relocation state
-                st.session_state.relocation_processing = False
-                st.session_state.relocation_results = None
-                st.session_state.relocation_logs = []
-                if 'relocation_file' in st.session_state:
-                    del st.session_state.relocation_file
+                # Detach from the job (it keeps running, see the sidebar) and clear relocation state
+                st.session_state.relocation_job_id = None
+                clear_results('relocation_results')
+                st.session_state.relocation_logs = None
                 st.rerun()
         
-        # Show processing status
-        if st.session_state.relocation_processing:
-            st.warning("⏳ Processing in progress... Please wait.")
-            
-            # Process the file if we're in processing state
-            if 'relocation_file' in st.session_state:
-                process_relocation_file(models, uid)
-        
         st.markdown('</div>', unsafe_allow_html=True)
     
+    # Follow the running job, if any
+    if st.session_state.relocation_job_id is not None:
+        show_job_status("Bulk Relocation")
+    show_job_failure("Bulk Relocation")
+    
     # Display results if available
     if (st.session_state.relocation_results is not None and 
-        not st.session_state.relocation_processing):
+        st.session_state.relocation_job_id is None):
         display_relocation_results()
 
-def process_relocation_file(models, uid):
-    """Process the relocation file (FULL LOGIC)"""
-    try:
-        # Read the file for processing
-        uploaded_file = st.session_state.relocation_file
-        DEST_LOCATION_ID = st.session_state.relocation_dest_id
-        
-        df = pd.read_excel(uploaded_file)
-        LOT_COLUMN = "Lot"
-        
-        # Initialize counters
-        success = []
-        failed = []
-        
-        # Create progress bar and status
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        # Process each lot
-        total_lots = len(df)
-        ctx = {'action_ref': 'stock.action_view_inventory_tree'}
-        
-        for index, row in df.iterrows():
-            lot_name = str(row[LOT_COLUMN]).strip()
+def process_relocation_file(job, odoo, upload, dest_location_id, quants_per_wizard, resume=False):
+    """Relocate the lots of an uploaded file (background job).
+    
+    Runs as a pipeline with one thread per stage and bounded queues in
+    between: batches are read from the file, their lots resolved to quants,
+    then relocated, so resolving batch N+1 overlaps relocating batch N.
+    Relocated lots are journaled; with `resume`, lots relocated by an
+    earlier run of the same file are skipped without any lookup.
+    """
+    DEST_LOCATION_ID = dest_location_id
+    QUANTS_PER_WIZARD = quants_per_wizard
+    journal = RunJournal("Bulk Relocation", upload['digest'], DEST_LOCATION_ID)
+    relocated_before = journal.start(resume)
+    
+    # Initialize counters
+    success = []
+    failed = []
+    duplicates = []
+    resumed = []
+    
+    total_lots = 0
+    seen = set()
+    job.logs = LogStore(['timestamp', 'lot', 'status', 'message'], categorical=['status'])
+    job.progress.phase("⚡ Relocating lots", upload['rows'], unit="rows")
+    read_stage = PipelineStage("📥 Read")
+    resolve_stage = PipelineStage("🔍 Resolve")
+    relocate_stage = PipelineStage("⚡ Relocate")
+    job.stages = [read_stage, resolve_stage, relocate_stage]
+    
+    # Each row's log entry is kept until its batch ends to log in file order
+    row_log = []
+    row_by_lot = {}
+    
+    def settle(index, status, message):
+        row_log[index] = (datetime.now().strftime("%H:%M:%S"), status, message)
+    
+    def relocate_chunk(chunk):
+        def relocate(lots):
+            quant_ids = [qid for _, lot_quant_ids in lots for qid in lot_quant_ids]
+            relocate_quants(odoo, quant_ids, DEST_LOCATION_ID, "Relocated via Streamlit Portal")
+        return execute_with_bisection(chunk, relocate)
+    
+    def chunk_outcomes(chunk, outcomes, error):
+        if error is not None:
+            return [(move, str(error)) for move in chunk]
+        return outcomes
+    
+    # Wizard size and concurrency adapt to Odoo's response times
+    relocate_control = AimdController("🎛️ Relocate", odoo, (ODOO_MIN_WORKERS, ODOO_MAX_WORKERS), (WIZARD_MIN_QUANTS, QUANTS_PER_WIZARD))
+    job.controllers = [relocate_control]
+    lot_errors = {}
+    
+    def on_result(index, chunk, outcomes, error):
+        outcomes = chunk_outcomes(chunk, outcomes, error)
+        journal.record([lot_name for (lot_name, _), lot_error in outcomes if lot_error is None])
+        for (lot_name, _), lot_error in outcomes:
+            lot_errors[lot_name] = lot_error
+            if lot_error is None:
+                settle(row_by_lot[lot_name], 'Success', f'Relocated to location {DEST_LOCATION_ID}')
+            else:
+                settle(row_by_lot[lot_name], 'Failed', lot_error)
+        job.progress.advance(len(chunk))
+    
+    def resolve(batches):
+        """Resolve stage: look up each batch's new lots in a few chunked calls"""
+        resolved = set()
+        for batch in batches:
+            with resolve_stage.work(len(batch)):
+                # Empty cells become empty names
+                lot_names = [value or '' for value in batch.get("Lot", [])]
+                unique_lots = list(dict.fromkeys(
+                    name for name in lot_names
+                    if name and name.lower() != 'nan' and name not in resolved and name not in relocated_before
+                ))
+                resolved.update(unique_lots)
+                plan = plan_relocation(odoo, unique_lots)
+            yield lot_names, plan
+    
+    batches = prefetch(read_stage.timed(iter_upload_batches(upload, ["Lot"])), PIPELINE_DEPTH, read_stage)
+    for lot_names, plan in prefetch(resolve(batches), PIPELINE_DEPTH, resolve_stage):
+        relocate_started = time.monotonic()
+        total_lots += len(lot_names)
+        quant_ids_by_lot = dict(plan['moves'])
+        missing_lots = set(plan['missing_lots'])
+        
+        # Classify rows
+        row_log = [None] * len(lot_names)
+        row_by_lot = {}
+        moves = []
+        for index, lot_name in enumerate(lot_names):
+            if not lot_name or lot_name.lower() == 'nan':
+                failed.append((lot_name, "Empty lot name"))
+                settle(index, 'Failed', 'Empty lot name')
+                continue
             
-            # Update progress
-            progress = (index + 1) / total_lots
-            progress_bar.progress(progress)
-            status_text.text(f"Processing {index + 1}/{total_lots}: {lot_name}")
+            if lot_name in seen:
+                duplicates.append(lot_name)
+                settle(index, 'Skipped', 'Duplicate of an earlier row')
+                continue
+            seen.add(lot_name)
             
-            # Log entry
-            log_entry = {
-                'timestamp': datetime.now().strftime("%H:%M:%S"),
-                'lot': lot_name,
-                'status': 'Processing',
-                'message': 'Started processing'
-            }
-            st.session_state.relocation_logs.append(log_entry)
+            if lot_name in relocated_before:
+                resumed.append(lot_name)
+                success.append(lot_name)
+                settle(index, 'Success', 'Relocated by an earlier run (resumed)')
+                continue
             
-            if not lot_name or lot_name.lower() == 'nan':
-                failed.append((lot_name, "Empty lot name"))
-                log_entry['status'] = 'Failed'
-                log_entry['message'] = 'Empty lot name'
+            if lot_name in missing_lots:
+                failed.append((lot_name, "Lot not found"))
+                settle(index, 'Failed', 'Lot not found in Odoo')
                 continue
             
-            try:
-                # Step 1: Find lot
-                lot_ids = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    'stock.lot', 'search',
-                    [[['name', '=', lot_name]]]
-                )
-                
-                if not lot_ids:
-                    failed.append((lot_name, "Lot not found"))
-                    log_entry['status'] = 'Failed'
-                    log_entry['message'] = 'Lot not found in Odoo'
-                    continue
-                
-                lot_id = lot_ids[0]
-                
-                # Step 2: Find quant
-                quant_ids = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    'stock.quant', 'search',
-                    [[['lot_id', '=', lot_id]]]
-                )
-                
-                if not quant_ids:
-                    failed.append((lot_name, "Quant not found"))
-                    log_entry['status'] = 'Failed'
-                    log_entry['message'] = 'No stock quant found'
-                    continue
-                
-                # Step 3: Create relocate wizard
-                wizard_id = models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    'stock.quant.relocate', 'create',
-                    [{
-                        'quant_ids': [(6, 0, quant_ids)],
-                        'dest_location_id': DEST_LOCATION_ID,
-                        'message': "Relocated via Streamlit Portal",
-                    }],
-                    {'context': ctx}
-                )
-                
-                # Step 4: Confirm relocate
-                models.execute_kw(
-                    ODOO_DB, uid, ODOO_ADMIN_PASSWORD,
-                    'stock.quant.relocate', 'action_relocate_quants',
-                    [[wizard_id]],
-                    {'context': ctx}
-                )
-                
+            if lot_name not in quant_ids_by_lot:
+                failed.append((lot_name, "Quant not found"))
+                settle(index, 'Failed', 'No stock quant found')
+                continue
+            
+            moves.append((lot_name, quant_ids_by_lot[lot_name]))
+            row_by_lot[lot_name] = index
+        job.progress.advance(len(lot_names) - len(moves))
+        
+        # Execute: one relocation wizard per chunk of quants, chunks run in parallel
+        # Chunks are cut as they are submitted, at the current adaptive size
+        chunks = group_moves(moves, lambda: relocate_control.batch_size)
+        run_parallel(chunks, relocate_chunk, on_result=on_result, controller=relocate_control)
+        
+        # Collect results in file order
+        for lot_name, _ in moves:
+            lot_error = lot_errors.pop(lot_name)
+            if lot_error is None:
                 success.append(lot_name)
-                log_entry['status'] = 'Success'
-                log_entry['message'] = f'Relocated to location {DEST_LOCATION_ID}'
-                
-            except Exception as e:
-                failed.append((lot_name, str(e)))
-                log_entry['status'] = 'Failed'
-                log_entry['message'] = str(e)
-        
-        # Clear progress indicators
-        progress_bar.empty()
-        status_text.empty()
-        
-        # Store results
-        st.session_state.relocation_results = {
-            'success': success,
-            'failed': failed,
-            'total': total_lots,
-            'timestamp': datetime.now()
-        }
-        
-        # Clear temporary file from session state
-        if 'relocation_file' in st.session_state:
-            del st.session_state.relocation_file
-        
-        # Update processing state
-        st.session_state.relocation_processing = False
-        
-        # Force rerun to update UI
-        st.rerun()
-        
-    except Exception as e:
-        st.error(f"❌ Error during processing: {str(e)}")
-        st.session_state.relocation_processing = False
-        if 'relocation_file' in st.session_state:
-            del st.session_state.relocation_file
+            else:
+                failed.append((lot_name, lot_error))
+        for lot_name, (timestamp, status, message) in zip(lot_names, row_log):
+            job.logs.append(timestamp, lot_name, status, message)
+        relocate_stage.record(len(lot_names), time.monotonic() - relocate_started)
+    
+    return {
+        'success': success,
+        'failed': failed,
+        'duplicates': duplicates,
+        'resumed': resumed,
+        'total': total_lots,
+        'stages': [stage.describe() for stage in job.stages + job.controllers],
+        'run_id': uuid.uuid4().hex,
+        'timestamp': datetime.now()
+    }
 
 def display_relocation_results():
     """Display relocation results"""
@@ -1467,6 +3436,15 @@ def display_relocation_results():
                  delta=f"-{failure_rate:.1f}%",
                  delta_color="inverse")
     
+    if results.get('duplicates'):
+        st.caption(f"♻️ Skipped {len(results['duplicates'])} duplicate rows (each lot is relocated once)")
+    if results.get('resumed'):
+        st.caption(f"⏭️ Resumed: {len(results['resumed'])} lots were already relocated by an earlier run")
+    if results.get('stages'):
+        with st.expander("🧮 Pipeline Stages"):
+            for stage in results['stages']:
+                st.caption(stage)
+    
     # Detailed results in tabs
     tab1, tab2, tab3 = st.tabs(["✅ Success", "❌ Failed", "📋 Logs"])
     
@@ -1476,10 +3454,10 @@ def display_relocation_results():
             st.dataframe(success_df, use_container_width=True)
             
             # Download button
-            csv = success_df.to_csv(index=False)
-            st.download_button(
+            lazy_download_button(
+                results['run_id'], "success_csv",
+                lambda: success_df.to_csv(index=False).encode('utf-8'),
                 label="📥 Download Success List",
-                data=csv,
                 file_name=f"success_relocation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True,
@@ -1494,10 +3472,10 @@ def display_relocation_results():
             st.dataframe(failed_df, use_container_width=True)
             
             # Download button
-            csv = failed_df.to_csv(index=False)
-            st.download_button(
+            lazy_download_button(
+                results['run_id'], "failed_csv",
+                lambda: failed_df.to_csv(index=False).encode('utf-8'),
                 label="📥 Download Failed List",
-                data=csv,
                 file_name=f"failed_relocation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
                 mime="text/csv",
                 use_container_width=True,
@@ -1507,11 +3485,7 @@ def display_relocation_results():
             st.info("No failures occurred during processing.")
     
     with tab3:
-        if st.session_state.relocation_logs:
-            log_df = pd.DataFrame(st.session_state.relocation_logs)
-            st.dataframe(log_df, use_container_width=True)
-        else:
-            st.info("No logs available.")
+        show_logs(st.session_state.relocation_logs, results['run_id'], "relocation_logs")
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1597,18 +3571,43 @@ def main():
             col_act1, col_act2 = st.columns(2)
             with col_act1:
                 if st.button("🔄 Refresh", use_container_width=True, help="Clear cached data"):
-                    fetch_qc_list.clear()
-                    st.session_state.qc_data = None
-                    st.session_state.qc_selected = None
+                    qc_name_index().invalidate()
+                    clear_qc_data()
                     st.success("✅ Cache cleared!")
                     time.sleep(0.5)
                     st.rerun()
             with col_act2:
                 if st.button("🚪 Logout", use_container_width=True):
-                    # Clear all session state
+                    # Drop generated downloads, then clear all session state
+                    for run_id in list(st.session_state.download_cache):
+                        evict_downloads(run_id)
                     for key in list(st.session_state.keys()):
                         del st.session_state[key]
                     st.rerun()
+
+            # Jobs outlive their session, so any of them can be reopened here
+            jobs = job_manager().recent()
+            if jobs:
+                st.markdown("---")
+                st.markdown("### 🧵 Background Jobs")
+                status_icons = {'Queued': '🕒', 'Running': '⏳', 'Done': '✅', 'Failed': '❌'}
+                for job in jobs[:10]:
+                    tab_name, job_key, _, _ = JOB_KINDS[job.kind]
+                    progress = f" · {job.snapshot['fraction']:.0%}" if job.snapshot and job.snapshot['total'] else ""
+                    st.caption(f"{status_icons[job.status]} {job.kind} · {job.created.strftime('%H:%M:%S')}{progress}")
+                    if st.button("📂 Open", use_container_width=True, key=f"open_job_{job.id}"):
+                        st.session_state[job_key] = job.id
+                        st.session_state.current_tab = tab_name
+                        st.rerun()
+            
+            # Bytes exchanged with Odoo by every session and job, before and after compression
+            traffic = st.session_state.odoo_conn.traffic
+            if traffic['calls']:
+                st.markdown("---")
+                st.markdown("### 📡 Odoo Traffic")
+                st.caption(f"{traffic['calls']:,} calls over {st.session_state.odoo_conn.protocol} · {traffic['retries']:,} retried")
+                st.caption(f"⬇️ {format_bytes(traffic['response_bytes'])} received · {format_bytes(traffic['response_wire_bytes'])} on the wire")
+                st.caption(f"⬆️ {format_bytes(traffic['request_bytes'])} sent · {format_bytes(traffic['request_wire_bytes'])} on the wire")
             
             st.markdown("---")
             st.caption(f"🕐 {datetime.now().strftime('%I:%M %p')}")
@@ -1644,18 +3643,17 @@ def main():
     
     else:
         # Dashboard with Tabs
-        models = st.session_state.odoo_conn["models"]
-        uid = st.session_state.odoo_conn["uid"]
+        odoo = st.session_state.odoo_conn
         
         # Display current tab content
         if st.session_state.current_tab == "QC Export":
-            show_qc_export_tab(models, uid)
+            show_qc_export_tab(odoo)
         elif st.session_state.current_tab == "Bulk Relocation":
-            show_bulk_relocation_tab(models, uid)
+            show_bulk_relocation_tab(odoo)
         elif st.session_state.current_tab == "Company-Safe Relocation":
-            show_company_safe_relocation_tab(models, uid)
+            show_company_safe_relocation_tab(odoo)
         elif st.session_state.current_tab == "Uncheck Ignored":
-            show_uncheck_ignored_tab(models, uid)
+            show_uncheck_ignored_tab(odoo)
         
         # Footer
         st.markdown("---")